@@ -12,6 +12,7 @@ from routes.misc import misc_bp
 from routes.advanced import advanced_bp
 from routes.auth import auth_bp
 from routes.steam_proxy import steam_proxy_bp
+from indexes import ensure_indexes
 
 
 # Register blueprints
@@ -23,5 +24,7 @@ app.register_blueprint(advanced_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(steam_proxy_bp)
 
+ensure_indexes()
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -23,6 +23,51 @@ JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "supersecretkey")
 # Expiration time (in hours)
 JWT_EXP_HOURS = int(os.getenv("JWT_EXP_HOURS", 1))
 
+# ============================================================
+# STEAM API RATE LIMIT
+# ============================================================
+
+# Global token bucket shared by every Steam caller in a process
+STEAM_RATE_PER_SEC = float(os.getenv("STEAM_RATE_PER_SEC", 5))
+STEAM_RATE_BURST = int(os.getenv("STEAM_RATE_BURST", 10))
+
+# /api/steam/batch: parallel upstream fetches and how long to wait before returning partial results
+STEAM_BATCH_CONCURRENCY = int(os.getenv("STEAM_BATCH_CONCURRENCY", 8))
+STEAM_BATCH_DEADLINE = float(os.getenv("STEAM_BATCH_DEADLINE", 6))
+
+# Appids per upstream appdetails?filters=price_overview call
+STEAM_PRICE_BATCH_SIZE = int(os.getenv("STEAM_PRICE_BATCH_SIZE", 50))
+
+# Pooled HTTP client: keep-alive connections per host, retries for 429/5xx, circuit breaker
+STEAM_HTTP_POOL_SIZE = int(os.getenv("STEAM_HTTP_POOL_SIZE", 10))
+STEAM_HTTP_RETRIES = int(os.getenv("STEAM_HTTP_RETRIES", 2))
+STEAM_HTTP_BACKOFF = float(os.getenv("STEAM_HTTP_BACKOFF", 0.5))
+# Open the breaker after this many consecutive failures; probe again after the cooldown
+STEAM_BREAKER_THRESHOLD = int(os.getenv("STEAM_BREAKER_THRESHOLD", 5))
+STEAM_BREAKER_COOLDOWN = float(os.getenv("STEAM_BREAKER_COOLDOWN", 30))
+
+# ============================================================
+# STEAM PROXY CACHE
+# ============================================================
+
+# memory = per-process only, sqlite = shared file only, tiered = both
+STEAM_CACHE_BACKEND = os.getenv("STEAM_CACHE_BACKEND", "tiered")
+STEAM_CACHE_MEMORY_MB = int(os.getenv("STEAM_CACHE_MEMORY_MB", 32))
+STEAM_CACHE_SHARED_MB = int(os.getenv("STEAM_CACHE_SHARED_MB", 256))
+STEAM_CACHE_PATH = os.getenv("STEAM_CACHE_PATH")  # defaults to a file in the system temp dir
+# Expired entries younger than this are served (X-Cache-Status: STALE) while refreshing in the background
+STEAM_CACHE_STALE_GRACE = int(os.getenv("STEAM_CACHE_STALE_GRACE", 6 * 60 * 60))
+# On startup, load this many of the most-hit on-disk entries into memory (0 disables)
+STEAM_CACHE_WARM_KEYS = int(os.getenv("STEAM_CACHE_WARM_KEYS", 500))
+
+# ============================================================
+# MAINTENANCE SCHEDULER
+# ============================================================
+
+# Job leases in Mongo expire after this long unless renewed by the running node
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", 120))
+SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", 30))
+
 # ============================================================
 # APP DEBUG / ENVIRONMENT SETTINGS
 # ============================================================
@@ -0,0 +1,252 @@
+import re
+import threading
+import time
+import queue
+import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pymongo import UpdateOne
+from config import db
+from steam_client import steam_get
+
+# ============================================================
+# BACKGROUND STEAM ENRICHMENT
+# ============================================================
+#
+# Request handlers never wait on Steam: games missing supported_languages
+# are queued here, a single daemon worker fetches them, writes the result
+# back to metadata.supported_languages, and remembers apps Steam has no
+# data for so they are not looked up again on every page view.
+
+games_collection = db.steamGames
+negative_cache_col = db.steam_negative_cache
+
+STEAM_APPDETAILS_URL = "https://store.steampowered.com/api/appdetails"
+QUEUE_MAX_SIZE = 1000
+NEGATIVE_CACHE_TTL = 7 * 24 * 3600  # also enforced by a TTL index on checked_at
+ERROR_RETRY_AFTER = 15 * 60       # back off this long after a network error
+SKIP_CACHE_MAX = 10000            # bound on the in-process negative cache
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+_queue = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+_pending = set()     # appids queued or in flight
+_skip_until = {}     # appid -> timestamp; in-process view of the negative cache
+_lock = threading.Lock()
+_worker = None
+
+
+def _parse_languages(languages_str):
+    languages_str = _HTML_TAG.sub("", languages_str or "")
+    return [lang.strip().rstrip("*").strip() for lang in languages_str.split(",") if lang.strip()]
+
+
+def lookup_supported_languages(appid, timeout=3):
+    """
+    Fetch supported languages for an app from Steam.
+    Returns (languages, definitive): definitive is False when the call itself failed,
+    so an empty result should not be negative-cached.
+    """
+    try:
+        # background/script caller: wait for a rate-limit token rather than fail
+        response = steam_get(STEAM_APPDETAILS_URL, params={"appids": appid, "l": "english"}, timeout=timeout)
+        if response.status_code != 200:
+            return [], False
+        entry = response.json().get(str(appid)) or {}
+        if not entry.get("success"):
+            return [], True
+        return _parse_languages(entry.get("data", {}).get("supported_languages")), True
+    except (requests.RequestException, ValueError):
+        return [], False
+
+
+def fetch_supported_languages(appid):
+    """
+    Fetch supported languages from Steam API for a given appid.
+    Returns a list of language strings or an empty list if unavailable.
+    """
+    languages, _ = lookup_supported_languages(appid)
+    return languages
+
+
+def _remember_miss(appid, retry_after):
+    now = time.time()
+    with _lock:
+        _skip_until.pop(appid, None)
+        if len(_skip_until) >= SKIP_CACHE_MAX:
+            # Drop expired entries; if still full, forget the oldest (the Mongo cache still has them)
+            for key in [k for k, until in _skip_until.items() if until <= now]:
+                del _skip_until[key]
+            while len(_skip_until) >= SKIP_CACHE_MAX:
+                del _skip_until[next(iter(_skip_until))]
+        _skip_until[appid] = now + retry_after
+
+
+def _is_known_miss(appid):
+    """Check the shared negative cache (Mongo) for apps another worker already gave up on."""
+    entry = negative_cache_col.find_one({"appid": appid, "kind": "supported_languages"}, {"_id": 0, "checked_at": 1})
+    if not entry:
+        return False
+    age = (datetime.utcnow() - entry["checked_at"]).total_seconds()
+    _remember_miss(appid, max(NEGATIVE_CACHE_TTL - age, 0))
+    return True
+
+
+# Games whose supported_languages still need filling
+MISSING_LANGUAGES = {"$or": [
+    {"metadata.supported_languages": {"$exists": False}},
+    {"metadata.supported_languages": {"$in": [None, "", []]}}
+]}
+
+
+def _negative_entry(appid):
+    return UpdateOne(
+        {"appid": appid, "kind": "supported_languages"},
+        {"$set": {"checked_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+def _process(appid):
+    if _is_known_miss(appid):
+        return
+
+    languages, definitive = lookup_supported_languages(appid)
+    if languages:
+        games_collection.update_one(
+            {"appid": appid, **MISSING_LANGUAGES},
+            {"$set": {"metadata.supported_languages": languages}}
+        )
+    elif definitive:
+        negative_cache_col.update_one(
+            {"appid": appid, "kind": "supported_languages"},
+            {"$set": {"checked_at": datetime.utcnow()}},
+            upsert=True
+        )
+        _remember_miss(appid, NEGATIVE_CACHE_TTL)
+    else:
+        _remember_miss(appid, ERROR_RETRY_AFTER)
+
+
+def _run():
+    while True:
+        appid = _queue.get()
+        try:
+            _process(appid)
+        except Exception as e:
+            print(f"[ENRICHMENT ERROR] appid {appid}: {e}")
+            _remember_miss(appid, ERROR_RETRY_AFTER)
+        finally:
+            with _lock:
+                _pending.discard(appid)
+            _queue.task_done()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_run, name="steam-enrichment", daemon=True)
+        _worker.start()
+
+
+def enqueue_supported_languages(appid):
+    """Queue an appid for background language lookup. Never blocks; returns True if queued."""
+    now = time.time()
+    with _lock:
+        if appid in _pending or _skip_until.get(appid, 0) > now:
+            return False
+        try:
+            _queue.put_nowait(appid)
+        except queue.Full:
+            return False
+        _pending.add(appid)
+        _ensure_worker()
+    return True
+
+
+def queue_stats():
+    """Snapshot of the enrichment queue (for debugging/metrics)."""
+    with _lock:
+        return {
+            "queued": _queue.qsize(),
+            "pending": len(_pending),
+            "negative_cached": sum(1 for t in _skip_until.values() if t > time.time()),
+            "worker_alive": bool(_worker and _worker.is_alive()),
+        }
+
+
+# ============================================================
+# BULK BACKFILL (scripts/fill_supported_languages.py)
+# ============================================================
+
+def _batches(cursor, size):
+    batch = []
+    for doc in cursor:
+        batch.append(doc["appid"])
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def backfill_supported_languages(workers=4, batch_size=200, limit=None, stop=None):
+    """
+    Fill metadata.supported_languages for every game that lacks it.
+    Streams only the appids of matching games, skips apps in the negative cache,
+    fetches concurrently (paced by the shared Steam rate limiter) and writes each
+    batch with bulk_write. Setting the `stop` Event ends the run after the current
+    batch. Returns a report dict with counts and throughput.
+    """
+    stats = Counter()
+    cursor = games_collection.find(
+        {**MISSING_LANGUAGES, "appid": {"$ne": None}}, {"_id": 0, "appid": 1}
+    ).batch_size(batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="languages-backfill") as pool:
+        for appids in _batches(cursor, batch_size):
+            if stop is not None and stop.is_set():
+                break
+            stats["scanned"] += len(appids)
+            known_misses = {
+                doc["appid"] for doc in negative_cache_col.find(
+                    {"appid": {"$in": appids}, "kind": "supported_languages"}, {"_id": 0, "appid": 1}
+                )
+            }
+            todo = [a for a in appids if a not in known_misses]
+            stats["skipped_negative"] += len(appids) - len(todo)
+
+            game_ops, negative_ops = [], []
+            for appid, (languages, definitive) in zip(todo, pool.map(lookup_supported_languages, todo)):
+                if languages:
+                    game_ops.append(UpdateOne(
+                        {"appid": appid, **MISSING_LANGUAGES},
+                        {"$set": {"metadata.supported_languages": languages}}
+                    ))
+                elif definitive:
+                    negative_ops.append(_negative_entry(appid))
+                else:
+                    stats["errors"] += 1
+            stats["negative"] += len(negative_ops)
+
+            if game_ops:
+                stats["updated"] += games_collection.bulk_write(game_ops, ordered=False).modified_count
+            if negative_ops:
+                negative_cache_col.bulk_write(negative_ops, ordered=False)
+
+            elapsed = time.time() - started
+            print(f"  {stats['scanned']} scanned, {stats['updated']} updated, {stats['negative']} without languages "
+                  f"({stats['scanned'] / max(elapsed, 1e-6):.1f} games/s)")
+
+    elapsed = time.time() - started
+    return {
+        "job": "supported_languages_backfill",
+        "elapsed_seconds": round(elapsed, 1),
+        "games_per_second": round(stats["scanned"] / max(elapsed, 1e-6), 2),
+        "stopped": bool(stop is not None and stop.is_set()),
+        "stats": dict(stats),
+    }
@@ -0,0 +1,57 @@
+from pymongo.errors import PyMongoError
+from config import db
+from ranking import RANKING_INDEXES
+from enrichment import NEGATIVE_CACHE_TTL
+from review_feed import BUCKET_RETENTION
+
+# ============================================================
+# INDEX DEFINITIONS
+# ============================================================
+
+GAME_INDEXES = [
+    [("appid", 1)],
+    *RANKING_INDEXES,
+    # Keyset pagination: every listing sort ends with the appid tiebreaker
+    [("reviews.positive", -1), ("appid", 1)],
+    [("created_at", -1), ("appid", 1)],
+    [("name", 1), ("appid", 1)],
+]
+
+# (collection name, keys, create_index options)
+AUXILIARY_INDEXES = [
+    # Per-game listings (review_store.REVIEW_SORTS), each with the _id tiebreaker
+    ("reviews", [("appid", 1), ("created_at", 1), ("_id", 1)], {}),
+    ("reviews", [("appid", 1), ("rating", -1), ("_id", -1)], {}),
+    ("reviews", [("appid", 1), ("username", 1), ("_id", 1)],
+     {"collation": {"locale": "en", "strength": 2}, "name": "appid_1_username_1_id_1_ci"}),
+    ("reviews", [("created_at", -1)], {}),
+    ("reviews", [("created_by", 1)], {}),
+    ("recent_reviews", [("created_at", -1)], {}),
+    ("recent_reviews", [("appid", 1)], {}),
+    ("review_minute_counts", [("minute", 1)],
+     {"unique": True, "expireAfterSeconds": int(BUCKET_RETENTION.total_seconds())}),
+    ("steam_negative_cache", [("appid", 1), ("kind", 1)], {"unique": True}),
+    ("steam_negative_cache", [("checked_at", 1)], {"expireAfterSeconds": NEGATIVE_CACHE_TTL}),
+    ("steam_prices", [("appid", 1)], {"unique": True}),
+    ("steam_prices", [("fetched_at", 1)], {}),
+    ("job_runs", [("job", 1), ("started_at", -1)], {}),
+]
+
+
+def _create_index(collection, keys, options):
+    try:
+        db[collection].create_index(keys, **options)
+        return True
+    except PyMongoError as e:
+        print(f"[INDEX ERROR] Failed to create {collection} index {keys}: {e}")
+        return False
+
+
+def ensure_indexes():
+    """
+    Create the indexes the API relies on (no-op for indexes that already exist).
+    Each index is created on its own, so one conflict doesn't skip the rest.
+    Returns the number that could not be created.
+    """
+    specs = [("steamGames", keys, {}) for keys in GAME_INDEXES] + AUXILIARY_INDEXES
+    return sum(1 for collection, keys, options in specs if not _create_index(collection, keys, options))
@@ -0,0 +1,160 @@
+import ast
+import re
+from functools import lru_cache
+
+# ============================================================
+# CANONICAL GAME SCHEMA
+# ============================================================
+#
+# metadata.developers / publishers / genres / tags / supported_languages
+#     -> list[str]
+# media.screenshots / media.movies
+#     -> list[dict]
+#
+# Legacy documents store these as a mix of real arrays, CSV strings,
+# stringified Python lists and stringified dicts ({tag: votes}).
+
+SCHEMA_VERSION = 1
+
+LIST_FIELDS = ["developers", "publishers", "genres", "tags", "supported_languages"]
+MEDIA_FIELDS = ["screenshots", "movies"]
+
+# Fields whose values never contain commas, so CSV strings can be split safely.
+# Company names ("Foo, Inc.") are kept whole.
+CSV_FIELDS = {"genres", "tags", "supported_languages"}
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def _literal(value):
+    """Parse a stringified Python literal, returning the original string on failure."""
+    text = value.strip()
+    if not text or text[0] not in "[{('\"":
+        return value
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def _clean(item):
+    return _HTML_TAG.sub("", str(item)).strip().strip("[]'\"*").strip()
+
+
+# Raw metadata strings repeat heavily across games (the same tag dict or
+# language list appears on thousands of documents), so each distinct string
+# is parsed once per process.
+PARSE_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_string(value, split_csv):
+    """Memoized string -> tuple of names. Returns a tuple so cached results stay immutable."""
+    parsed = _literal(value)
+    if parsed is value:
+        parts = value.split(",") if split_csv else [value]
+        return tuple(c for c in (_clean(p) for p in parts) if c)
+    return tuple(to_string_list(parsed, split_csv))
+
+
+def to_string_list(value, split_csv=False):
+    """
+    Normalize any legacy representation into a flat list of non-empty strings.
+    Dicts (e.g. {tag: votes}) contribute their keys.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return list(_parse_string(value, split_csv))
+    if isinstance(value, dict):
+        return [c for c in (_clean(k) for k in value.keys()) if c]
+    if isinstance(value, (list, tuple)):
+        result = []
+        for item in value:
+            if isinstance(item, str):
+                result.extend(_parse_string(item, split_csv))
+            else:
+                result.extend(to_string_list(item, split_csv))
+        return result
+    cleaned = _clean(value)
+    return [cleaned] if cleaned else []
+
+
+def to_field_list(field, value):
+    """Canonical list for one of the LIST_FIELDS."""
+    return to_string_list(value, split_csv=field in CSV_FIELDS)
+
+
+def normalize_list_fields(metadata):
+    """Single pass over a metadata dict: every LIST_FIELD as a canonical list (missing -> [])."""
+    metadata = metadata if isinstance(metadata, dict) else {}
+    return {field: to_field_list(field, metadata.get(field)) for field in LIST_FIELDS}
+
+
+def parse_cache_info():
+    """Expose hit/miss stats of the parse memo (useful for benchmarks and debugging)."""
+    return _parse_string.cache_info()
+
+
+def to_media_list(value):
+    """Normalize media.screenshots / media.movies into a list of dicts."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        parsed = _literal(value)
+        return [] if parsed is value else to_media_list(parsed)
+    if isinstance(value, dict):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        result = []
+        for item in value:
+            if isinstance(item, dict):
+                result.append(item)
+            else:
+                result.extend(to_media_list(item))
+        return result
+    return []
+
+
+def canonical_updates(doc):
+    """
+    Return the `$set` fields needed to bring `doc` to the canonical schema.
+    An empty dict means the document is already canonical.
+    """
+    updates = {}
+    metadata = doc.get("metadata")
+    if isinstance(metadata, dict):
+        for field in LIST_FIELDS:
+            if field in metadata:
+                canonical = to_field_list(field, metadata[field])
+                if canonical != metadata[field]:
+                    updates[f"metadata.{field}"] = canonical
+
+    media = doc.get("media")
+    if isinstance(media, dict):
+        for field in MEDIA_FIELDS:
+            if field in media:
+                canonical = to_media_list(media[field])
+                if canonical != media[field]:
+                    updates[f"media.{field}"] = canonical
+
+    if doc.get("schema_version") != SCHEMA_VERSION:
+        updates["schema_version"] = SCHEMA_VERSION
+    return updates
+
+
+# Fields canonical_updates() looks at; project these when reading a doc before a write
+CANONICAL_PROJECTION = {
+    "_id": 0, "schema_version": 1,
+    **{f"metadata.{field}": 1 for field in LIST_FIELDS},
+    **{f"media.{field}": 1 for field in MEDIA_FIELDS},
+}
+
+
+def with_canonical(doc, set_fields):
+    """
+    `$set` fields for a write to `doc` (None for a new document) that also bring
+    the rest of it to the canonical schema, so the written document can carry
+    schema_version. Explicit `set_fields` win over the normalized values.
+    """
+    return {**canonical_updates(doc or {}), **set_fields}
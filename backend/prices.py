@@ -0,0 +1,279 @@
+import threading
+import time
+import queue
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from config import db, STEAM_PRICE_BATCH_SIZE
+from ranking import with_ranking
+from steam_client import fetch_price_overviews
+
+# ============================================================
+# LOCAL STEAM PRICE STORE
+# ============================================================
+#
+# steam_prices holds one document per appid:
+#     {appid, cc, price_overview, final, currency, fetched_at}
+# Request handlers read it with a single `$in` query and never call Steam;
+# appids that are missing or older than PRICE_STALE_AFTER are queued for a
+# daemon worker that refreshes them in multi-appid batches.
+
+steam_prices_col = db.steam_prices
+games_collection = db.steamGames
+checkpoints_col = db.job_checkpoints
+
+PRICE_COUNTRY = "gb"
+PRICE_STALE_AFTER = timedelta(hours=6)
+QUEUE_MAX_SIZE = 5000
+
+_queue = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+_pending = set()     # appids queued or in flight
+_lock = threading.Lock()
+_worker = None
+
+
+def price_document(appid, price_overview, fetched_at, cc=PRICE_COUNTRY):
+    """steam_prices document for one appid (price_overview is None for free/delisted apps)."""
+    price_overview = price_overview or None
+    return {
+        "appid": appid,
+        "cc": cc,
+        "price_overview": price_overview,
+        "final": price_overview.get("final") if price_overview else None,
+        "currency": price_overview.get("currency") if price_overview else None,
+        "fetched_at": fetched_at,
+    }
+
+
+def store_prices(prices, cc=PRICE_COUNTRY):
+    """Upsert {appid: price_overview} into steam_prices with one bulk_write. Returns the number written."""
+    if not prices:
+        return 0
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne({"appid": appid}, {"$set": price_document(appid, overview, now, cc)}, upsert=True)
+        for appid, overview in prices.items()
+    ]
+    steam_prices_col.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def get_stored_prices(appids):
+    """
+    One `$in` query: {appid: steam_prices document} for the appids we have.
+    Missing or stale appids are queued for a background refresh.
+    """
+    appids = [a for a in dict.fromkeys(appids) if a is not None]
+    if not appids:
+        return {}
+    try:
+        docs = steam_prices_col.find({"appid": {"$in": appids}}, {"_id": 0})
+        prices = {doc["appid"]: doc for doc in docs}
+    except PyMongoError as e:
+        print(f"[PRICE ERROR] steam_prices lookup failed: {e}")
+        return {}
+
+    cutoff = datetime.utcnow() - PRICE_STALE_AFTER
+    for appid in appids:
+        doc = prices.get(appid)
+        if doc is None or doc.get("fetched_at") is None or doc["fetched_at"] < cutoff:
+            enqueue_price_refresh(appid)
+    return prices
+
+
+def refresh_prices(appids, cc=PRICE_COUNTRY):
+    """Fetch prices for `appids` from Steam (batched) and store them. Returns the number stored."""
+    return store_prices(fetch_price_overviews(appids, cc=cc), cc)
+
+
+def _drain(first):
+    batch = [first]
+    while len(batch) < STEAM_PRICE_BATCH_SIZE:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run():
+    while True:
+        batch = _drain(_queue.get())
+        try:
+            refresh_prices(batch)
+        except Exception as e:
+            print(f"[PRICE ERROR] refresh of {len(batch)} appids failed: {e}")
+        finally:
+            with _lock:
+                _pending.difference_update(batch)
+            for _ in batch:
+                _queue.task_done()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_run, name="steam-prices", daemon=True)
+        _worker.start()
+
+
+def enqueue_price_refresh(appid):
+    """Queue an appid for a background price refresh. Never blocks; returns True if queued."""
+    with _lock:
+        if appid in _pending:
+            return False
+        try:
+            _queue.put_nowait(appid)
+        except queue.Full:
+            return False
+        _pending.add(appid)
+        _ensure_worker()
+    return True
+
+
+def price_queue_stats():
+    """Snapshot of the price refresh queue (for debugging/metrics)."""
+    with _lock:
+        return {
+            "queued": _queue.qsize(),
+            "pending": len(_pending),
+            "worker_alive": bool(_worker and _worker.is_alive()),
+        }
+
+
+# ============================================================
+# CATALOG PRICE REFRESH (scripts/update_gbp_prices.py)
+# ============================================================
+#
+# Walks the catalog most-popular first, skips appids whose stored price is
+# still fresh, fetches the rest in multi-appid batches on a small thread pool
+# (every call draws from the shared Steam rate limiter), and writes each
+# window with two bulk_writes. The position is checkpointed after every
+# window so a crashed run resumes where it stopped.
+
+PRICE_REFRESH_JOB = "price_refresh"
+POPULARITY_SORT = [("reviews.positive", -1), ("appid", 1)]
+
+
+def _after_position(position):
+    """Keyset filter for games after `position` in POPULARITY_SORT (missing counts sort last)."""
+    if not position:
+        return {}
+    positive, appid = position.get("positive"), position.get("appid")
+    if positive is None:
+        return {"reviews.positive": None, "appid": {"$gt": appid}}
+    return {"$or": [
+        {"reviews.positive": {"$lt": positive}},
+        {"reviews.positive": positive, "appid": {"$gt": appid}},
+        {"reviews.positive": None},
+    ]}
+
+
+def _windows(cursor, size):
+    window = []
+    for doc in cursor:
+        window.append(doc)
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def _save_checkpoint(position, stats, done=False):
+    checkpoints_col.update_one(
+        {"_id": PRICE_REFRESH_JOB},
+        {"$set": {"position": position, "stats": dict(stats), "done": done, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+def _price_ops(appid, overview, stored, now, cc):
+    """steam_prices write for one fetched appid; unchanged prices only bump fetched_at."""
+    if stored and stored.get("price_overview") == (overview or None):
+        return UpdateOne({"appid": appid}, {"$set": {"fetched_at": now}}), False
+    return UpdateOne({"appid": appid}, {"$set": price_document(appid, overview, now, cc)}, upsert=True), True
+
+
+def refresh_catalog_prices(workers=4, batch_size=STEAM_PRICE_BATCH_SIZE, max_age=PRICE_STALE_AFTER,
+                           restart=False, limit=None, cc=PRICE_COUNTRY, stop=None):
+    """
+    Refresh steam_prices and metadata.price for the whole catalog. Resumes from the
+    last checkpoint unless the previous pass finished or `restart` is set.
+    Setting the `stop` Event ends the run after the current window, leaving the
+    checkpoint open so the next run resumes there.
+    Returns a report dict with counts and throughput.
+    """
+    checkpoint = {} if restart else (checkpoints_col.find_one({"_id": PRICE_REFRESH_JOB}) or {})
+    if checkpoint.get("done"):
+        checkpoint = {}  # previous pass completed; start a new one
+    stats = Counter(checkpoint.get("stats", {}))
+    position = checkpoint.get("position")
+    if position:
+        print(f"Resuming {PRICE_REFRESH_JOB} after appid {position.get('appid')}")
+
+    cursor = games_collection.find(
+        _after_position(position),
+        {"_id": 0, "appid": 1, "metadata.price": 1, "reviews.positive": 1}
+    ).sort(POPULARITY_SORT).batch_size(workers * batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="price-refresh") as pool:
+        for window in _windows(cursor, workers * batch_size):
+            if stop is not None and stop.is_set():
+                break
+            stats["scanned"] += len(window)
+            appids = [g["appid"] for g in window if g.get("appid") is not None]
+            stored = {
+                doc["appid"]: doc
+                for doc in steam_prices_col.find({"appid": {"$in": appids}}, {"_id": 0, "appid": 1, "price_overview": 1, "fetched_at": 1})
+            }
+            cutoff = datetime.utcnow() - max_age
+            stale = [a for a in appids if not (stored.get(a) and stored[a].get("fetched_at") and stored[a]["fetched_at"] >= cutoff)]
+            stats["skipped_fresh"] += len(appids) - len(stale)
+
+            fetched = {}
+            chunks = [stale[i:i + batch_size] for i in range(0, len(stale), batch_size)]
+            for result in pool.map(lambda chunk: fetch_price_overviews(chunk, cc=cc), chunks):
+                fetched.update(result)
+            stats["fetched"] += len(fetched)
+            stats["failed"] += len(stale) - len(fetched)
+
+            now = datetime.utcnow()
+            price_ops, game_ops = [], []
+            current_price = {g["appid"]: (g.get("metadata") or {}).get("price") for g in window if g.get("appid") is not None}
+            for appid, overview in fetched.items():
+                op, changed = _price_ops(appid, overview, stored.get(appid), now, cc)
+                price_ops.append(op)
+                stats["price_changed" if changed else "price_unchanged"] += 1
+                if overview and overview.get("final") is not None:
+                    price = overview["final"] / 100.0
+                    if current_price.get(appid) != price:
+                        game_ops.append(UpdateOne({"appid": appid}, with_ranking({"metadata.price": price})))
+
+            if price_ops:
+                steam_prices_col.bulk_write(price_ops, ordered=False)
+            if game_ops:
+                stats["games_updated"] += games_collection.bulk_write(game_ops, ordered=False).modified_count
+
+            last = window[-1]
+            position = {"positive": (last.get("reviews") or {}).get("positive"), "appid": last.get("appid")}
+            _save_checkpoint(position, stats)
+            elapsed = time.time() - started
+            print(f"  {stats['scanned']} scanned, {stats['fetched']} fetched, {stats['games_updated']} games updated "
+                  f"({stats['fetched'] / max(elapsed, 1e-6):.1f} prices/s)")
+
+    stopped = stop is not None and stop.is_set()
+    _save_checkpoint(position, stats, done=not stopped)
+    elapsed = time.time() - started
+    return {
+        "job": PRICE_REFRESH_JOB,
+        "elapsed_seconds": round(elapsed, 1),
+        "prices_per_second": round(stats["fetched"] / max(elapsed, 1e-6), 2),
+        "stopped": stopped,
+        "stats": dict(stats),
+    }
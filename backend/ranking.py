@@ -0,0 +1,92 @@
+"""
+Materialized ranking fields for the games catalog.
+
+Each game document carries a ``ranking`` sub-document so listing endpoints
+can sort on an index instead of scoring the whole collection in Python:
+
+    ranking.value_score       (positive ratio / price) * 1000
+    ranking.positive_percent  positive / (positive + negative) * 100
+    ranking.review_score      positive_percent once there are 5+ reviews,
+                              otherwise Steam's reviews.pct_pos_total
+
+The scores are recomputed server-side with an aggregation-pipeline update
+whenever reviews or price change, so the write and the recompute happen in
+the same round trip.
+"""
+
+RANKING_INDEXES = [
+    [("ranking.value_score", -1), ("appid", 1)],
+    [("ranking.positive_percent", -1), ("appid", 1)],
+]
+
+
+def _to_double(field_path):
+    return {"$convert": {"input": field_path, "to": "double", "onError": 0, "onNull": 0}}
+
+
+def ranking_stage():
+    """Return a pipeline ``$set`` stage that recomputes ``ranking`` from the document itself."""
+    pos = _to_double("$reviews.positive")
+    neg = _to_double("$reviews.negative")
+    price = _to_double("$metadata.price")
+    ratio = {"$divide": ["$$pos", {"$max": ["$$total", 1]}]}
+    percent = {"$round": [{"$multiply": [ratio, 100]}, 2]}
+
+    return {"$set": {"ranking": {"$let": {
+        "vars": {"pos": pos, "total": {"$add": [pos, neg]}, "price": price},
+        "in": {
+            "positive_percent": {"$cond": [{"$gt": ["$$total", 0]}, percent, 0]},
+            "value_score": {"$cond": [
+                {"$and": [{"$gt": ["$$price", 0]}, {"$gt": ["$$pos", 0]}]},
+                {"$round": [{"$multiply": [{"$divide": [ratio, {"$max": ["$$price", 0.01]}]}, 1000]}, 2]},
+                0
+            ]},
+            "review_score": {"$cond": [
+                {"$gte": ["$$total", 5]},
+                percent,
+                {"$ifNull": ["$reviews.pct_pos_total", 0]}
+            ]},
+        }
+    }}}}
+
+
+def with_ranking(set_fields):
+    """
+    Build an update pipeline that applies ``set_fields`` and then refreshes ``ranking``.
+    Values are wrapped in ``$literal`` so strings such as review comments starting
+    with ``$`` are never interpreted as field paths.
+    """
+    return [
+        {"$set": {key: {"$literal": value} for key, value in set_fields.items()}},
+        ranking_stage(),
+    ]
+
+
+def compute_ranking(reviews, price):
+    """Python mirror of ``ranking_stage`` for documents built before insert."""
+    reviews = reviews or {}
+    try:
+        pos = float(reviews.get("positive") or 0)
+        neg = float(reviews.get("negative") or 0)
+    except (TypeError, ValueError):
+        pos, neg = 0.0, 0.0
+    try:
+        price = float(price or 0)
+    except (TypeError, ValueError):
+        price = 0.0
+
+    total = pos + neg
+    ratio = pos / total if total > 0 else 0
+    percent = round(ratio * 100, 2) if total > 0 else 0
+    value_score = round((ratio / price) * 1000, 2) if price > 0 and pos > 0 else 0
+    review_score = percent if total >= 5 else (reviews.get("pct_pos_total") or 0)
+    return {
+        "positive_percent": percent,
+        "value_score": value_score,
+        "review_score": review_score,
+    }
+
+
+def refresh_ranking(collection, query=None):
+    """Recompute ``ranking`` for every document matching ``query``."""
+    return collection.update_many(query or {}, [ranking_stage()])
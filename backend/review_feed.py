@@ -0,0 +1,146 @@
+import itertools
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError
+from config import db
+from review_store import reviews_collection
+
+# ============================================================
+# RECENT REVIEWS FEED
+# ============================================================
+#
+# recent_reviews keeps the newest FEED_SIZE reviews across the catalog, with
+# the game name copied in, so the recent feed is one indexed tail query:
+#     {_id (review id), appid, gameName, username, comment, rating,
+#      created_by, created_at, updated_at?, updated_by?}
+# It is bounded by trimming every TRIM_EVERY inserts (so it holds at most
+# FEED_SIZE + TRIM_EVERY entries; reads take the newest FEED_SIZE) rather than
+# created as a MongoDB capped collection: capped collections reject deletes
+# and size-changing updates, and the feed needs both (review edits and deletes).
+#
+# review_minute_counts holds one {minute, count} bucket per minute in which
+# reviews were posted; the last-hour count sums the 60 newest (the current,
+# partial minute and the 59 before it), so it may miss up to a minute. Buckets
+# expire via a TTL index on `minute` (see indexes.py).
+
+recent_reviews_col = db.recent_reviews
+minute_counts_col = db.review_minute_counts
+games_collection = db.steamGames
+
+FEED_SIZE = 100
+TRIM_EVERY = 25
+BUCKET_RETENTION = timedelta(hours=2)
+
+_inserts = itertools.count(1)
+_inserts_lock = threading.Lock()
+
+
+def _minute(moment):
+    return moment.replace(second=0, microsecond=0)
+
+
+def trim_feed():
+    """Delete feed entries older than the newest FEED_SIZE."""
+    oldest_kept = list(recent_reviews_col.find({}, {"created_at": 1}).sort("created_at", -1).skip(FEED_SIZE - 1).limit(1))
+    if oldest_kept:
+        recent_reviews_col.delete_many({"created_at": {"$lt": oldest_kept[0]["created_at"]}})
+
+
+def feed_review(review, appid, game_name):
+    """Add a newly created review to the feed (trimmed every TRIM_EVERY inserts) and count it in its minute bucket."""
+    try:
+        recent_reviews_col.replace_one(
+            {"_id": review["_id"]},
+            {**review, "appid": appid, "gameName": game_name},
+            upsert=True
+        )
+        with _inserts_lock:
+            due = next(_inserts) % TRIM_EVERY == 0
+        if due:
+            trim_feed()
+        minute_counts_col.update_one(
+            {"minute": _minute(review["created_at"])}, {"$inc": {"count": 1}}, upsert=True
+        )
+    except PyMongoError as e:
+        print(f"[FEED ERROR] adding review {review.get('_id')}: {e}")
+
+
+def update_feed_review(review_id, changes):
+    """Apply an edit to the feed entry, if the review is still in the feed."""
+    try:
+        recent_reviews_col.update_one({"_id": review_id}, {"$set": changes})
+    except PyMongoError as e:
+        print(f"[FEED ERROR] updating review {review_id}: {e}")
+
+
+def unfeed_review(review):
+    """Drop a deleted review from the feed and from its minute bucket."""
+    try:
+        recent_reviews_col.delete_one({"_id": review["_id"]})
+        created_at = review.get("created_at")
+        if created_at and created_at >= datetime.utcnow() - BUCKET_RETENTION:
+            minute_counts_col.update_one({"minute": _minute(created_at), "count": {"$gt": 0}}, {"$inc": {"count": -1}})
+    except PyMongoError as e:
+        print(f"[FEED ERROR] removing review {review.get('_id')}: {e}")
+
+
+def update_feed_game(appid, name=None, new_appid=None):
+    """Carry a game rename (or appid change) over to its feed entries."""
+    changes = {}
+    if name is not None:
+        changes["gameName"] = name
+    if new_appid is not None:
+        changes["appid"] = new_appid
+    if not changes:
+        return
+    try:
+        recent_reviews_col.update_many({"appid": appid}, {"$set": changes})
+    except PyMongoError as e:
+        print(f"[FEED ERROR] updating feed entries of {appid}: {e}")
+
+
+def unfeed_game(appid):
+    """Drop every feed entry of a deleted game (minute buckets age out on their own)."""
+    try:
+        recent_reviews_col.delete_many({"appid": appid})
+    except PyMongoError as e:
+        print(f"[FEED ERROR] removing feed entries of {appid}: {e}")
+
+
+def recent_feed(limit=FEED_SIZE):
+    """Newest reviews across all games, newest first (tail of the created_at index)."""
+    return list(recent_reviews_col.find({}).sort("created_at", -1).limit(min(limit, FEED_SIZE)))
+
+
+def recent_hour_count():
+    """Reviews posted in the last hour, summed from the 60 newest per-minute buckets."""
+    since = _minute(datetime.utcnow() - timedelta(hours=1)) + timedelta(minutes=1)
+    result = list(minute_counts_col.aggregate([
+        {"$match": {"minute": {"$gte": since}}},
+        {"$group": {"_id": None, "count": {"$sum": "$count"}}}
+    ]))
+    return result[0]["count"] if result else 0
+
+
+def rebuild_review_feed():
+    """Re-seed the feed and the minute buckets from the reviews collection. Returns a report dict."""
+    latest = list(reviews_collection.find({}).sort("created_at", -1).limit(FEED_SIZE))
+    appids = list({r.get("appid") for r in latest})
+    names = {
+        g["appid"]: g.get("name")
+        for g in games_collection.find({"appid": {"$in": appids}}, {"_id": 0, "appid": 1, "name": 1})
+    }
+    recent_reviews_col.delete_many({})
+    if latest:
+        recent_reviews_col.insert_many([{**r, "gameName": names.get(r.get("appid"))} for r in latest])
+
+    since = datetime.utcnow() - BUCKET_RETENTION
+    buckets = Counter(
+        _minute(r["created_at"])
+        for r in reviews_collection.find({"created_at": {"$gte": since}}, {"_id": 0, "created_at": 1})
+    )
+    minute_counts_col.delete_many({})
+    if buckets:
+        minute_counts_col.insert_many([{"minute": minute, "count": count} for minute, count in buckets.items()])
+    return {"job": "review_feed_rebuild", "stats": {"feed": len(latest), "buckets": len(buckets)}}
@@ -0,0 +1,130 @@
+import time
+from bson import ObjectId, json_util
+from pymongo import UpdateOne
+from config import db
+
+# ============================================================
+# REVIEW ID REPAIR
+# ============================================================
+#
+# Older embedded reviews were written without an _id, which breaks the
+# per-review PUT/DELETE routes. This gives each of them a fresh ObjectId,
+# touching only the affected array elements. It runs as the first step of
+# scripts/migrate_reviews_collection.py and on its own via
+# scripts/fix_missing_review_ids.py (e.g. --dry-run before migrating);
+# reviews in the reviews collection always have an _id.
+
+games_collection = db.steamGames
+
+MISSING_PLACEHOLDERS = [None, "", "None", "null", False, 0]
+
+# An embedded review whose _id is missing or a placeholder value
+MISSING_ID = {"$or": [
+    {"_id": {"$exists": False}},
+    {"_id": {"$in": MISSING_PLACEHOLDERS}},
+]}
+
+# Same test as an aggregation expression over $$review
+_MISSING_ID_EXPR = {"$or": [
+    {"$eq": [{"$type": "$$review._id"}, "missing"]},
+    {"$in": ["$$review._id", MISSING_PLACEHOLDERS]},
+]}
+
+
+def _content_key(review):
+    return json_util.dumps({k: review[k] for k in sorted(review) if k != "_id"})
+
+
+def _game_update(game):
+    """
+    Ops that give each id-less review of one game its own ObjectId.
+    Reviews are told apart by their content: every distinct one gets an arrayFilters
+    identifier, so a single update sets them all. Identical id-less duplicates can't
+    be told apart by a filter and get one positional update each instead.
+    """
+    groups = {}
+    all_fields = set()
+    for review in game["missing"]:
+        groups.setdefault(_content_key(review), []).append(review)
+        all_fields.update(k for k in review if k != "_id")
+
+    def exact(prefix, content):
+        # Match this content only, not an id-less review with extra fields
+        absent = {f"{prefix}{k}": {"$exists": False} for k in all_fields - set(content)}
+        return {**{f"{prefix}{k}": v for k, v in content.items()}, **absent}
+
+    sets, array_filters, positional = {}, [], []
+    for reviews in groups.values():
+        review = reviews[0]
+        content = {k: v for k, v in review.items() if k != "_id"}
+        if len(reviews) > 1 or not content:
+            positional.extend(reviews)
+            continue
+        identifier = f"r{len(array_filters)}"
+        sets[f"reviews.list.$[{identifier}]._id"] = ObjectId()
+        array_filters.append({
+            **exact(f"{identifier}.", content),
+            "$or": [
+                {f"{identifier}._id": {"$exists": False}},
+                {f"{identifier}._id": {"$in": MISSING_PLACEHOLDERS}},
+            ],
+        })
+
+    ops = []
+    if sets:
+        ops.append(UpdateOne({"_id": game["_id"]}, {"$set": sets}, array_filters=array_filters))
+    for review in positional:
+        content = {k: v for k, v in review.items() if k != "_id"}
+        ops.append(UpdateOne(
+            {"_id": game["_id"], "reviews.list": {"$elemMatch": {**exact("", content), **MISSING_ID}}},
+            {"$set": {"reviews.list.$._id": ObjectId()}}
+        ))
+    return ops
+
+
+def repair_review_ids(batch_size=500, dry_run=False):
+    """
+    Add an _id to every embedded review that lacks one. Returns a report dict.
+
+    Only games with an id-less review are streamed, projected down to their
+    id-less reviews. Each game is fixed with one arrayFilters update that sets
+    a fresh ObjectId on each of those elements without rewriting the array.
+    """
+    stats = {"games_scanned": 0, "repaired": 0, "games_updated": 0}
+    cursor = games_collection.aggregate([
+        {"$match": {"reviews.list": {"$elemMatch": MISSING_ID}}},
+        {"$project": {"missing": {"$filter": {
+            "input": "$reviews.list", "as": "review", "cond": _MISSING_ID_EXPR
+        }}}},
+    ], batchSize=batch_size)
+
+    started = time.time()
+    ops = []
+
+    def flush():
+        if ops and not dry_run:
+            # ordered: a game's positional fallbacks must apply one after another
+            games_collection.bulk_write(ops, ordered=True)
+        ops.clear()
+
+    for game in cursor:
+        stats["games_scanned"] += 1
+        missing = [r for r in game["missing"] if isinstance(r, dict)]
+        if not missing:
+            continue
+        stats["games_updated"] += 1
+        stats["repaired"] += len(missing)
+        ops.extend(_game_update({**game, "missing": missing}))
+        if len(ops) >= batch_size:
+            flush()
+    flush()
+
+    elapsed = time.time() - started
+    return {
+        "job": "review_id_repair",
+        "dry_run": dry_run,
+        "elapsed_seconds": round(elapsed, 2),
+        "reviews_per_second": round(stats["repaired"] / max(elapsed, 1e-6), 1),
+        "games_per_second": round(stats["games_scanned"] / max(elapsed, 1e-6), 1),
+        "stats": stats,
+    }
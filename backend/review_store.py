@@ -0,0 +1,134 @@
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from config import db
+from ranking import ranking_stage
+from serialization import to_extended_json
+
+# ============================================================
+# REVIEWS COLLECTION
+# ============================================================
+#
+# One document per user review (previously embedded in steamGames.reviews.list):
+#     {_id, appid, username, comment, rating, created_by, created_at,
+#      updated_at?, updated_by?}
+# The per-game counters (reviews.num_reviews_total / positive / negative /
+# review_snippet) stay denormalized on the game document and are maintained
+# incrementally by review_counter_update().
+
+reviews_collection = db.reviews
+
+# Fields returned for a review in per-game responses (same keys the embedded entries had)
+REVIEW_PROJECTION = {"appid": 0}
+
+POSITIVE_THRESHOLD = 50
+
+# Per-game listings: every sort ends with the _id tiebreaker so ?after= cursors
+# never skip or repeat a review (see indexes.py for the matching indexes)
+REVIEW_SORTS = {
+    "date": [("created_at", -1), ("_id", -1)],
+    "rating": [("rating", -1), ("_id", -1)],
+    "username": [("username", 1), ("_id", 1)],
+}
+USERNAME_COLLATION = {"locale": "en", "strength": 2}  # case-insensitive username ordering
+REVIEWS_PAGE_SIZE = 50       # page size for ?pn=/?after= requests without ?ps=
+REVIEWS_MAX_PAGE_SIZE = 100
+
+
+def review_id_filter(review_id):
+    """Match a review by its id as given in the URL (ObjectId hex, or a legacy string id)."""
+    try:
+        return {"_id": {"$in": [ObjectId(review_id), review_id]}}
+    except (InvalidId, TypeError):
+        return {"_id": review_id}
+
+
+def serialize_review(review, extended=False):
+    """API shape of one review: string _id, no appid; dates as extended JSON if `extended`."""
+    review_id = review.get("_id")
+    review = {k: v for k, v in review.items() if k != "appid"}
+    if extended:
+        review = to_extended_json(review)
+    review["_id"] = str(review_id) if review_id else None
+    return review
+
+
+def serialize_reviews(reviews_list, extended=False):
+    return [serialize_review(r, extended) for r in reviews_list]
+
+
+def reviews_for_game(appid):
+    """All reviews for a game, oldest first (the order the embedded list kept)."""
+    return list(reviews_collection.find({"appid": appid}, REVIEW_PROJECTION).sort("created_at", 1))
+
+
+def review_filter_query(appid, filter_type="all"):
+    """Query for a game's reviews, optionally only positive or negative ones."""
+    query = {"appid": appid}
+    if filter_type == "positive":
+        query["rating"] = {"$gte": POSITIVE_THRESHOLD}
+    elif filter_type == "negative":
+        query["$or"] = [{"rating": {"$lt": POSITIVE_THRESHOLD}}, {"rating": None}]
+    return query
+
+
+def review_sort(sort_by="date"):
+    """(sort spec, collation) for a per-game listing; unknown values sort by date."""
+    sort_by = sort_by if sort_by in REVIEW_SORTS else "date"
+    return REVIEW_SORTS[sort_by], (USERNAME_COLLATION if sort_by == "username" else None)
+
+
+def reviews_for_games(appids):
+    """{appid: [reviews oldest first]} for several games with one `$in` query."""
+    grouped = {appid: [] for appid in appids}
+    cursor = reviews_collection.find({"appid": {"$in": list(appids)}}).sort([("appid", 1), ("created_at", 1)])
+    for review in cursor:
+        grouped.setdefault(review["appid"], []).append(review)
+    return grouped
+
+
+def is_positive(rating):
+    return (rating or 0) >= POSITIVE_THRESHOLD
+
+
+def _counter(field, delta):
+    current = {"$convert": {"input": f"${field}", "to": "long", "onError": 0, "onNull": 0}}
+    return {"$max": [0, {"$add": [current, delta]}]}
+
+
+def review_counter_update(delta_total=0, delta_positive=0, snippet=None, modified_by=None):
+    """
+    Update pipeline for the game document: apply review count deltas, optionally
+    replace review_snippet (an aggregation expression; wrap user text in $literal),
+    stamp last_modified_* and refresh ranking. One atomic update, no read-modify-write.
+    """
+    fields = {}
+    delta_negative = delta_total - delta_positive
+    for field, delta in (("num_reviews_total", delta_total), ("positive", delta_positive), ("negative", delta_negative)):
+        if delta:
+            fields[f"reviews.{field}"] = _counter(f"reviews.{field}", delta)
+    if snippet is not None:
+        fields["reviews.review_snippet"] = snippet
+    fields["reviews.last_modified_at"] = {"$literal": datetime.utcnow()}
+    fields["reviews.last_modified_by"] = {"$literal": modified_by}
+    return [{"$set": fields}, ranking_stage()]
+
+
+def replace_snippet_if(old_comment, new_comment):
+    """Snippet expression: swap in `new_comment` only if the current snippet is `old_comment`."""
+    return {"$cond": [
+        {"$eq": ["$reviews.review_snippet", {"$literal": old_comment}]},
+        {"$literal": new_comment},
+        "$reviews.review_snippet"
+    ]}
+
+
+def stats_response(game):
+    """The dotted-key counters put/delete responses have always returned."""
+    reviews = (game or {}).get("reviews") or {}
+    return {
+        'reviews.num_reviews_total': reviews.get('num_reviews_total', 0),
+        'reviews.positive': reviews.get('positive', 0),
+        'reviews.negative': reviews.get('negative', 0),
+        'reviews.review_snippet': reviews.get('review_snippet', ''),
+    }
@@ -1,6 +1,11 @@
 from flask import Blueprint, request
 from config import db
-from utils import api_response, ensure_array, get_pagination_params, enrich_games_with_steam_prices
+from normalize import to_field_list
+from prices import get_stored_prices
+from utils import (
+    api_response, get_pagination_params, get_cursor_param, keyset_find,
+    count_results, enrich_games_with_steam_prices
+)
 
 # Single unified collection
 games_collection = db.steamGames
@@ -43,8 +48,8 @@ def get_top_games():
                 "appid": game.get("appid"),
                 "name": game.get("name"),
                 "price": game.get("metadata", {}).get("price"),
-                "developers": ensure_array(game.get("metadata", {}).get("developers")),
-                "publishers": ensure_array(game.get("metadata", {}).get("publishers")),
+                "developers": to_field_list("developers", game.get("metadata", {}).get("developers")),
+                "publishers": to_field_list("publishers", game.get("metadata", {}).get("publishers")),
                 "reviews": game.get("reviews")
             })
         
@@ -203,19 +208,24 @@ def search_games():
         query["metadata.tags"] = {"$regex": tag, "$options": "i"}
 
     sort_order = -1 if order == "desc" else 1
+    sort = [(sort_field, sort_order)] if sort_field == "appid" else [(sort_field, sort_order), ("appid", 1)]
+    after, error = get_cursor_param(sort)
+    if error:
+        return error
 
-    results = list(
-        games_collection.find(query, {
+    results, next_cursor = keyset_find(
+        games_collection, query, {
             "_id": 0, "appid": 1, "name": 1, "metadata.price": 1,
             "metadata.release_date": 1, "metadata.developers": 1,
             "metadata.genres": 1, "metadata.tags": 1,
             "reviews.metacritic_score": 1, "reviews.positive": 1, "reviews.negative": 1
-        }).sort(sort_field, sort_order).skip(page_start).limit(page_size)
+        }, sort, page_start, page_size, after
     )
 
-    total_count = games_collection.count_documents(query)
+    total_count, estimated = count_results(games_collection, query)
     results = enrich_games_with_steam_prices(results)
-    return api_response(results, page_num, page_size, total_count, status=200)
+    return api_response(results, page_num, page_size, total_count, status=200,
+                        next_cursor=next_cursor, count_estimated=estimated)
 
 
 # ============================================================
@@ -229,8 +239,6 @@ def get_top_games_enriched():
     Eliminates need for frontend to make separate Steam API calls.
     Example: /api/v1.0/games/advanced/top-enriched?metric=positive&limit=4
     """
-    import requests
-    import time
     
     metric = request.args.get('metric', 'positive')
     limit = int(request.args.get('limit', 10))
@@ -255,26 +263,12 @@ def get_top_games_enriched():
             ).sort("playtime.peak_ccu", -1).limit(limit)
         )
     
-    # Enrich with Steam data in parallel
-    steam_url_template = "https://store.steampowered.com/api/appdetails?appids={}&filters=price_overview"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Accept": "application/json"
-    }
-    
+    # Join Steam prices from the local store (one $in query; refreshed in the background)
+    prices = get_stored_prices([g.get('appid') for g in games])
     for game in games:
-        appid = game.get('appid')
-        try:
-            resp = requests.get(steam_url_template.format(appid), headers=headers, timeout=3)
-            if resp.status_code == 200:
-                data = resp.json()
-                steam_data = data.get(str(appid), {}).get('data', {})
-                price_overview = steam_data.get('price_overview')
-                if price_overview:
-                    game['price_overview'] = price_overview
-                    game['price_gbp'] = price_overview.get('final', 0) / 100
-            time.sleep(0.1)  # Rate limiting
-        except Exception:
-            pass  # Use existing price data
+        price_overview = (prices.get(game.get('appid')) or {}).get('price_overview')
+        if price_overview:
+            game['price_overview'] = price_overview
+            game['price_gbp'] = price_overview.get('final', 0) / 100
     
     return api_response(games, status=200)
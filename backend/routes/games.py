@@ -1,13 +1,19 @@
 from flask import Blueprint, request
 import json
-import ast
-import requests
 from datetime import datetime
 from config import db
+from normalize import (
+    SCHEMA_VERSION, CANONICAL_PROJECTION, normalize_list_fields, to_field_list, to_media_list, with_canonical
+)
+from ranking import compute_ranking, with_ranking
+from review_store import reviews_collection, reviews_for_game, serialize_reviews
+from review_feed import update_feed_game, unfeed_game
+from steam_client import steam_get
 from utils import (
-    clean_doc, clean_docs, get_pagination_params,
+    clean_doc, clean_docs, get_pagination_params, get_cursor_param, keyset_find,
+    count_results, invalidate_counts,
     api_response, normalize_metadata, require_auth, require_admin,
-    log_action, ensure_array, enrich_games_with_steam_prices, enrich_with_steam_price
+    log_action, enrich_games_with_steam_prices, enrich_with_steam_price
 )
 
 games_collection = db.steamGames
@@ -54,141 +60,79 @@ def get_games():
     # Handle sorting
     if sort_by == 'topRated':
         # Sort by highest positive review count, then paginate
-        cursor = games_collection.find({}, projection).sort("reviews.positive", -1)
-        total_count = games_collection.count_documents({})
-
-        # Get paginated results
-        paginated_games = list(cursor.skip(page_start).limit(page_size))
+        sort = [("reviews.positive", -1), ("appid", 1)]
+        after, error = get_cursor_param(sort)
+        if error:
+            return error
+        paginated_games, next_cursor = keyset_find(
+            games_collection, {}, projection, sort, page_start, page_size, after
+        )
+        total_count, estimated = count_results(games_collection)
 
         # Normalize structure
         from utils import enrich_with_supported_languages
         normalized_games = []
-        def extract_tags(val):
-            if isinstance(val, dict):
-                return list(val.keys())
-            elif isinstance(val, list):
-                result = []
-                for t in val:
-                    # If element is a stringified dict, parse and extract keys
-                    if isinstance(t, str):
-                        try:
-                            parsed = ast.literal_eval(t)
-                            if isinstance(parsed, dict):
-                                result.extend(list(parsed.keys()))
-                            elif isinstance(parsed, list):
-                                result.extend([str(x) for x in parsed])
-                            else:
-                                result.append(str(parsed))
-                        except Exception:
-                            result.append(t)
-                    elif isinstance(t, dict):
-                        result.extend(list(t.keys()))
-                    else:
-                        result.append(str(t))
-                return result
-            elif isinstance(val, str):
-                try:
-                    parsed = ast.literal_eval(val)
-                    return extract_tags(parsed)
-                except Exception:
-                    return [val]
-            elif val is not None:
-                return [str(val)]
-            return []
         for game in paginated_games:
             enrich_with_supported_languages(game)
-            raw_tags = game.get("metadata", {}).get("tags")
-            tags = extract_tags(raw_tags)
+            lists = normalize_list_fields(game.get("metadata"))
             normalized_games.append({
                 "appid": game.get("appid"),
                 "name": game.get("name"),
                 "price": game.get("metadata", {}).get("price"),
-                "developers": ensure_array(game.get("metadata", {}).get("developers")),
-                "publishers": ensure_array(game.get("metadata", {}).get("publishers")),
-                "tags": tags,
-                "supported_languages": ensure_array(game.get("metadata", {}).get("supported_languages")),
+                "developers": lists["developers"],
+                "publishers": lists["publishers"],
+                "tags": lists["tags"],
+                "supported_languages": lists["supported_languages"],
                 "reviews": game.get("reviews")
             })
 
         # Note: Steam price enrichment removed for performance (use MongoDB price or Steam proxy endpoint)
-        return api_response(normalized_games, page_num, page_size, total_count)
+        return api_response(normalized_games, page_num, page_size, total_count,
+                            next_cursor=next_cursor, count_estimated=estimated)
     
-    elif sort_by == 'value':
-        # Use value for money calculation
-        all_games = list(games_collection.find({}, projection))
-        from utils import enrich_with_supported_languages
-        normalized_games = []
-        for game in all_games:
-            pos = int(game.get("reviews", {}).get("positive", 0))
-            neg = int(game.get("reviews", {}).get("negative", 0))
-            total = pos + neg
-            positive_ratio = (pos / total) if total > 0 else 0
-            price = float(game.get("metadata", {}).get("price", 0))
-            if price > 0 and positive_ratio > 0:
-                value_score = round((positive_ratio / price) * 1000, 2)
-            else:
-                value_score = 0
-            if total >= 5:
-                review_score = round((pos / total) * 100, 2)
-            else:
-                review_score = game.get("reviews", {}).get("pct_pos_total", 0)
-            raw_tags = game.get("metadata", {}).get("tags")
-            tags = extract_tags(raw_tags)
-            normalized_games.append({
-                "appid": game.get("appid"),
-                "name": game.get("name"),
-                "price": game.get("metadata", {}).get("price"),
-                "developers": ensure_array(game.get("metadata", {}).get("developers")),
-                "publishers": ensure_array(game.get("metadata", {}).get("publishers")),
-                "tags": tags,
-                "supported_languages": ensure_array(game.get("metadata", {}).get("supported_languages")),
-                "review_score": review_score,
-                "value_score": value_score
-            })
-        normalized_games.sort(key=lambda x: x.get('value_score', 0), reverse=True)
-        total_count = len(normalized_games)
-        data_to_return = normalized_games[page_start:page_start + page_size]
-        # Note: Steam price enrichment removed for performance
-        return api_response(data_to_return, page_num, page_size, total_count)
-    
-    elif sort_by == 'sentiment':
-        # Use sentiment breakdown
-        all_games = list(games_collection.find({}, projection))
-        from utils import enrich_with_supported_languages
+    elif sort_by in ('value', 'sentiment'):
+        # Served from the materialized ranking fields (see ranking.py)
+        score_field = 'value_score' if sort_by == 'value' else 'positive_percent'
+        ranked_projection = {**projection, 'ranking': 1}
+        sort = [(f"ranking.{score_field}", -1), ("appid", 1)]
+        after, error = get_cursor_param(sort)
+        if error:
+            return error
+        ranked_games, next_cursor = keyset_find(
+            games_collection, {}, ranked_projection, sort, page_start, page_size, after
+        )
+        total_count, estimated = count_results(games_collection)
+
         normalized_games = []
-        for game in all_games:
-            pos = int(game.get("reviews", {}).get("positive", 0))
-            neg = int(game.get("reviews", {}).get("negative", 0))
-            total = pos + neg
-            positive_percent = round((pos / total) * 100, 2) if total > 0 else 0
-            if total >= 5:
-                review_score = round((pos / total) * 100, 2)
-            else:
-                review_score = game.get("reviews", {}).get("pct_pos_total", 0)
-            raw_tags = game.get("metadata", {}).get("tags")
-            tags = extract_tags(raw_tags)
+        for game in ranked_games:
+            ranking = game.get("ranking", {})
+            lists = normalize_list_fields(game.get("metadata"))
             normalized_games.append({
                 "appid": game.get("appid"),
                 "name": game.get("name"),
                 "price": game.get("metadata", {}).get("price"),
-                "developers": ensure_array(game.get("metadata", {}).get("developers")),
-                "publishers": ensure_array(game.get("metadata", {}).get("publishers")),
-                "tags": tags,
-                "supported_languages": ensure_array(game.get("metadata", {}).get("supported_languages")),
-                "review_score": review_score,
-                "positive_percent": positive_percent
+                "developers": lists["developers"],
+                "publishers": lists["publishers"],
+                "tags": lists["tags"],
+                "supported_languages": lists["supported_languages"],
+                "review_score": ranking.get("review_score", 0),
+                score_field: ranking.get(score_field, 0)
             })
-        normalized_games.sort(key=lambda x: x.get('positive_percent', 0), reverse=True)
-        total_count = len(normalized_games)
-        data_to_return = normalized_games[page_start:page_start + page_size]
-        return api_response(data_to_return, page_num, page_size, total_count)
+        return api_response(normalized_games, page_num, page_size, total_count,
+                            next_cursor=next_cursor, count_estimated=estimated)
     
     else:
         # Default: sorted by appid
-        cursor = games_collection.find({}, projection).sort("appid", 1).skip(page_start).limit(page_size)
+        sort = [("appid", 1)]
+        after, error = get_cursor_param(sort)
+        if error:
+            return error
+        games, next_cursor = keyset_find(
+            games_collection, {}, projection, sort, page_start, page_size, after
+        )
         
         data_to_return = []
-        for game in cursor:
+        for game in games:
             pos = int(game.get("reviews", {}).get("positive", 0))
             neg = int(game.get("reviews", {}).get("negative", 0))
             total = pos + neg
@@ -197,26 +141,23 @@ def get_games():
             else:
                 review_score = game.get("reviews", {}).get("pct_pos_total")
 
-            raw_tags = game.get("metadata", {}).get("tags")
-            if isinstance(raw_tags, dict):
-                tags = list(raw_tags.keys())
-            else:
-                tags = ensure_array(raw_tags)
+            lists = normalize_list_fields(game.get("metadata"))
             data_to_return.append({
                 "appid": game.get("appid"),
                 "name": game.get("name"),
                 "price": game.get("metadata", {}).get("price"),
-                "developers": ensure_array(game.get("metadata", {}).get("developers")),
-                "publishers": ensure_array(game.get("metadata", {}).get("publishers")),
-                "tags": tags,
-                "supported_languages": ensure_array(game.get("metadata", {}).get("supported_languages")),
+                "developers": lists["developers"],
+                "publishers": lists["publishers"],
+                "tags": lists["tags"],
+                "supported_languages": lists["supported_languages"],
                 "review_score": review_score
             })
-        total_count = games_collection.count_documents({})
+        total_count, estimated = count_results(games_collection)
 
         # Note: Steam price enrichment removed for performance (prices are in MongoDB metadata.price)
 
-        return api_response(data_to_return, page_num, page_size, total_count)
+        return api_response(data_to_return, page_num, page_size, total_count,
+                            next_cursor=next_cursor, count_estimated=estimated)
 
 
 @games_bp.route("/api/v1.0/games/<int:appid>", methods=['GET'])
@@ -226,68 +167,14 @@ def get_game(appid):
     if not game:
         return api_response({"error": "Game not found"}, status=404)
 
-    # Flatten metadata
+    # Flatten metadata: array fields always come back as lists of strings
     metadata = game.get("metadata", {})
-    game.update(normalize_metadata(metadata, as_array=False))
-
-
-    # Safely parse JSON-like strings for array fields and always ensure arrays
-    for field in ["developers", "publishers", "genres", "tags", "supported_languages"]:
-        value = game.get(field)
-        if isinstance(value, str):
-            try:
-                parsed = ast.literal_eval(value)
-                if isinstance(parsed, list):
-                    game[field] = parsed
-                elif isinstance(parsed, str):
-                    game[field] = [parsed]
-                else:
-                    game[field] = []
-            except Exception:
-                game[field] = [value] if value else []
-        elif isinstance(value, list):
-            game[field] = value
-        else:
-            game[field] = []
+    game.update(normalize_list_fields(metadata))
 
     # Enrich supported_languages if missing
     from utils import enrich_with_supported_languages
     enrich_with_supported_languages(game)
 
-    # Normalize tags to always be a list of strings
-    def extract_tags(val):
-        if isinstance(val, dict):
-            return list(val.keys())
-        elif isinstance(val, list):
-            result = []
-            for t in val:
-                if isinstance(t, str):
-                    try:
-                        parsed = ast.literal_eval(t)
-                        if isinstance(parsed, dict):
-                            result.extend(list(parsed.keys()))
-                        elif isinstance(parsed, list):
-                            result.extend([str(x) for x in parsed])
-                        else:
-                            result.append(str(parsed))
-                    except Exception:
-                        result.append(t)
-                elif isinstance(t, dict):
-                    result.extend(list(t.keys()))
-                else:
-                    result.append(str(t))
-            return result
-        elif isinstance(val, str):
-            try:
-                parsed = ast.literal_eval(val)
-                return extract_tags(parsed)
-            except Exception:
-                return [val]
-        elif val is not None:
-            return [str(val)]
-        return []
-    game['tags'] = extract_tags(game.get('tags', []))
-
     # Flatten description fields
     desc = game.get("description", {})
     game["short_description"] = desc.get("short_description", "")
@@ -302,14 +189,8 @@ def get_game(appid):
         media = {}
     game["media"] = media
     for key in ["screenshots", "movies"]:
-        if key in media and isinstance(media[key], list):
-            try:
-                parsed = ast.literal_eval(media[key][0])
-                game["media"][key] = parsed
-            except Exception:
-                game["media"][key] = []
-        else:
-            game["media"][key] = []
+        # Canonical docs already hold lists of dicts; legacy docs hold a stringified list
+        game["media"][key] = to_media_list(media.get(key))
 
     # Reviews list excluded from this endpoint (use with-reviews endpoint)
     # Only include review stats
@@ -330,95 +211,6 @@ def get_game(appid):
 
     return api_response(game)
 
-    # Flatten metadata
-    metadata = game.get("metadata", {})
-    game.update(normalize_metadata(metadata, as_array=False))
-
-    # Safely parse JSON-like strings for array fields
-    for field in ["developers", "publishers", "genres", "tags", "supported_languages"]:
-        value = game.get(field)
-        if isinstance(value, str):
-            try:
-                game[field] = ast.literal_eval(value)
-            except Exception:
-                game[field] = []
-        # Ensure always an array (even if missing or malformed)
-        if not isinstance(game.get(field), list):
-            game[field] = []
-
-    # Enrich supported_languages if missing
-    from utils import enrich_with_supported_languages
-    enrich_with_supported_languages(game)
-
-    # Normalize tags to always be a list of strings
-    def extract_tags(val):
-        if isinstance(val, dict):
-            return list(val.keys())
-        elif isinstance(val, list):
-            result = []
-            for t in val:
-                if isinstance(t, str):
-                    try:
-                        parsed = ast.literal_eval(t)
-                        if isinstance(parsed, dict):
-                            result.extend(list(parsed.keys()))
-                        elif isinstance(parsed, list):
-                            result.extend([str(x) for x in parsed])
-                        else:
-                            result.append(str(parsed))
-                    except Exception:
-                        result.append(t)
-                elif isinstance(t, dict):
-                    result.extend(list(t.keys()))
-                else:
-                    result.append(str(t))
-            return result
-        elif isinstance(val, str):
-            try:
-                parsed = ast.literal_eval(val)
-                return extract_tags(parsed)
-            except Exception:
-                return [val]
-        elif val is not None:
-            return [str(val)]
-        return []
-    game['tags'] = extract_tags(game.get('tags', []))
-
-    # Flatten description fields
-    desc = game.get("description", {})
-    game["short_description"] = desc.get("short_description", "")
-    game["detailed_description"] = desc.get("detailed_description", "")
-    game["about_the_game"] = desc.get("about_the_game", "")
-    game.pop("description", None)  # optional: remove nested dict
-
-    # Safely parse media screenshots & movies
-    media = game.get("media", {})
-    # Ensure 'media' key exists and is a dict
-    if not isinstance(media, dict):
-        media = {}
-    game["media"] = media
-    for key in ["screenshots", "movies"]:
-        if key in media and isinstance(media[key], list):
-            try:
-                parsed = ast.literal_eval(media[key][0])
-                game["media"][key] = parsed
-            except Exception:
-                game["media"][key] = []
-        else:
-            game["media"][key] = []
-
-    # Reviews list excluded from this endpoint (use with-reviews endpoint)
-    # Only include review stats
-    reviews = game.get('reviews', {})
-    if isinstance(reviews, dict):
-        # Remove list if it somehow got through
-        reviews.pop('list', None)
-        game['reviews'] = reviews
-
-    # Note: Steam price enrichment removed for performance (use metadata.price or Steam proxy endpoint)
-
-    return api_response(game)
-
 
 # ============================================================
 # ADMIN ROUTES (Require Admin Privileges)
@@ -439,11 +231,11 @@ def post_game():
             'metadata': {
                 'release_date': request.form['release_date'].strip(),
                 'price': float(request.form['price']),
-                'developers': ensure_array(json.loads(request.form.get('developers', '[]'))),
-                'publishers': ensure_array(json.loads(request.form.get('publishers', '[]'))),
-                'genres': ensure_array(json.loads(request.form.get('genres', '[]'))),
-                'tags': ensure_array(json.loads(request.form.get('tags', '[]'))),
-                'supported_languages': ensure_array(json.loads(request.form.get('supported_languages', '[]')))
+                'developers': to_field_list('developers', json.loads(request.form.get('developers', '[]'))),
+                'publishers': to_field_list('publishers', json.loads(request.form.get('publishers', '[]'))),
+                'genres': to_field_list('genres', json.loads(request.form.get('genres', '[]'))),
+                'tags': to_field_list('tags', json.loads(request.form.get('tags', '[]'))),
+                'supported_languages': to_field_list('supported_languages', json.loads(request.form.get('supported_languages', '[]')))
             },
             'description': {
                 'short_description': request.form.get('short_description', '')
@@ -452,12 +244,15 @@ def post_game():
                 'peak_ccu': int(request.form.get('peak_ccu', 0))
             },
             'created_by': request.user["username"],
-            'created_at': datetime.utcnow()
+            'created_at': datetime.utcnow(),
+            'schema_version': SCHEMA_VERSION
         }
     except Exception as e:
         return api_response({"error": f"Invalid data format: {str(e)}"}, status=400)
 
+    new_game['ranking'] = compute_ranking(new_game.get('reviews'), new_game['metadata']['price'])
     games_collection.insert_one(new_game)
+    invalidate_counts(games_collection)
     log_action(request.user, "create", "game", new_game['appid'], new_game, status=201)
     return api_response({"message": "Game added successfully", "appid": new_game['appid']}, status=201)
 
@@ -480,7 +275,7 @@ def put_game(appid):
 
             if field in ['developers', 'publishers', 'genres', 'tags', 'supported_languages']:
                 try:
-                    value = ensure_array(json.loads(value))
+                    value = to_field_list(field, json.loads(value))
                 except Exception:
                     return api_response({"error": f"Invalid JSON for {field}"}, status=400)
                 update_fields[f"metadata.{field}"] = value
@@ -528,8 +323,16 @@ def put_game(appid):
     update_fields["last_modified_by"] = request.user["username"]
     update_fields["last_modified_at"] = datetime.utcnow()
 
-    result = games_collection.update_one({'appid': appid}, {'$set': update_fields})
+    # Normalize the rest of a legacy document in the same write, so schema_version holds
+    current = games_collection.find_one({'appid': appid}, CANONICAL_PROJECTION)
+    if current is not None:
+        update_fields = with_canonical(current, update_fields)
+
+    # Price and review counts feed the materialized ranking, so refresh it in the same write
+    result = games_collection.update_one({'appid': appid}, with_ranking(update_fields))
     if result.matched_count == 1:
+        if 'name' in update_fields:
+            update_feed_game(appid, name=update_fields['name'])
         log_action(request.user, "update", "game", appid, update_fields, status=200)
         return api_response({"message": "Game updated successfully"}, status=200)
     else:
@@ -543,6 +346,9 @@ def delete_game(appid):
     """Delete a game (admin only)."""
     result = games_collection.delete_one({'appid': appid})
     if result.deleted_count == 1:
+        reviews_collection.delete_many({'appid': appid})
+        unfeed_game(appid)
+        invalidate_counts(games_collection)
         log_action(request.user, "delete", "game", appid, {"deleted_game": appid}, status=200)
         return api_response({"message": f"Game {appid} deleted by {request.user['username']}"}, status=200)
     else:
@@ -600,88 +406,56 @@ def filter_games():
         sort_by = "name"
     order = request.args.get("order", "asc")
     sort_order = 1 if order == "asc" else -1
-
-
-    # Query filtered games with needed fields for normalization
-    cursor = (
-        games_collection.find(
-            query,
-            {
-                "_id": 0,
-                "appid": 1,
-                "name": 1,
-                "metadata.price": 1,
-                "metadata.developers": 1,
-                "metadata.publishers": 1,
-                "metadata.tags": 1,
-                "metadata.supported_languages": 1,
-                "reviews": 1
-            },
-        )
-        .sort(sort_by, sort_order)
-        .skip(page_start)
-        .limit(page_size)
+    sort = [(sort_by, sort_order)] if sort_by == "appid" else [(sort_by, sort_order), ("appid", 1)]
+    after, error = get_cursor_param(sort)
+    if error:
+        return error
+
+    # Query filtered games with needed fields for normalization (plus the sort keys for the cursor)
+    games, next_cursor = keyset_find(
+        games_collection,
+        query,
+        {
+            "_id": 0,
+            "appid": 1,
+            "name": 1,
+            "metadata.price": 1,
+            "metadata.release_date": 1,
+            "metadata.developers": 1,
+            "metadata.publishers": 1,
+            "metadata.tags": 1,
+            "metadata.supported_languages": 1,
+            "playtime.peak_ccu": 1,
+            "reviews": 1
+        },
+        sort, page_start, page_size, after
     )
 
     # Normalize like get_games
-    def extract_tags(val):
-        if isinstance(val, dict):
-            return list(val.keys())
-        elif isinstance(val, list):
-            result = []
-            for t in val:
-                if isinstance(t, str):
-                    try:
-                        import ast
-                        parsed = ast.literal_eval(t)
-                        if isinstance(parsed, dict):
-                            result.extend(list(parsed.keys()))
-                        elif isinstance(parsed, list):
-                            result.extend([str(x) for x in parsed])
-                        else:
-                            result.append(str(parsed))
-                    except Exception:
-                        result.append(t)
-                elif isinstance(t, dict):
-                    result.extend(list(t.keys()))
-                else:
-                    result.append(str(t))
-            return result
-        elif isinstance(val, str):
-            try:
-                import ast
-                parsed = ast.literal_eval(val)
-                return extract_tags(parsed)
-            except Exception:
-                return [val]
-        elif val is not None:
-            return [str(val)]
-        return []
-
     data_to_return = []
     from utils import enrich_with_supported_languages
-    for game in cursor:
+    for game in games:
         # Enrich supported_languages if missing or empty
         enrich_with_supported_languages(game)
-        tags = extract_tags(game.get("metadata", {}).get("tags"))
-        supported_languages = ensure_array(game.get("metadata", {}).get("supported_languages"))
+        lists = normalize_list_fields(game.get("metadata"))
         data_to_return.append(
             {
                 "appid": game.get("appid"),
                 "name": game.get("name"),
                 "price": game.get("metadata", {}).get("price"),
-                "developers": ensure_array(game.get("metadata", {}).get("developers")),
-                "publishers": ensure_array(game.get("metadata", {}).get("publishers")),
-                "tags": tags,
-                "supported_languages": supported_languages,
+                "developers": lists["developers"],
+                "publishers": lists["publishers"],
+                "tags": lists["tags"],
+                "supported_languages": lists["supported_languages"],
                 "reviews": game.get("reviews")
             }
         )
 
     # Total count for pagination
-    total_count = games_collection.count_documents(query)
+    total_count, estimated = count_results(games_collection, query)
 
-    return api_response(data_to_return, page_num, page_size, total_count)
+    return api_response(data_to_return, page_num, page_size, total_count,
+                        next_cursor=next_cursor, count_estimated=estimated)
 
 
 
@@ -689,7 +463,7 @@ def filter_games():
 @games_bp.route("/api/v1.0/games/stats", methods=['GET'])
 def get_game_stats():
     """Return simple aggregated statistics (total, avg price, top peak ccu game, etc.)."""
-    total_games = games_collection.count_documents({})
+    total_games = games_collection.estimated_document_count()
 
     avg_price_pipeline = [
         {"$addFields": {"price_numeric": {"$toDouble": "$metadata.price"}}},
@@ -729,9 +503,9 @@ def get_action_logs():
     page_num, page_size, page_start = get_pagination_params()
     cursor = logs_col.find({}, {'_id': 0}).sort('timestamp', -1).skip(page_start).limit(page_size)
     logs = list(cursor)
-    total = logs_col.count_documents({})
+    total, estimated = count_results(logs_col)
 
-    return api_response(logs, page_num, page_size, total)
+    return api_response(logs, page_num, page_size, total, count_estimated=estimated)
 
 
 # ============================================================
@@ -752,14 +526,7 @@ def get_enriched_game(appid):
     # Flatten and normalize game data (same as get_game)
     metadata = game.get("metadata", {})
     game.update(normalize_metadata(metadata, as_array=False))
-
-    for field in ["developers", "publishers", "genres", "tags", "supported_languages"]:
-        value = game.get(field)
-        if isinstance(value, str):
-            try:
-                game[field] = ast.literal_eval(value)
-            except Exception:
-                game[field] = []
+    game.update(normalize_list_fields(metadata))
 
     desc = game.get("description", {})
     game["short_description"] = desc.get("short_description", "")
@@ -768,22 +535,17 @@ def get_enriched_game(appid):
     game.pop("description", None)
 
     media = game.get("media", {})
+    if not isinstance(media, dict):
+        media = {}
+    game["media"] = media
     for key in ["screenshots", "movies"]:
-        if key in media and isinstance(media[key], list):
-            try:
-                parsed = ast.literal_eval(media[key][0])
-                game["media"][key] = parsed
-            except Exception:
-                game["media"][key] = []
-        else:
-            game["media"][key] = []
+        # Canonical docs already hold lists of dicts; legacy docs hold a stringified list
+        game["media"][key] = to_media_list(media.get(key))
 
     reviews = game.get('reviews', {})
-    if isinstance(reviews, dict) and isinstance(reviews.get('list'), list):
-        reviews['list'] = [
-            {**r, '_id': str(r['_id']) if '_id' in r and r['_id'] else None}
-            for r in reviews['list']
-        ]
+    if isinstance(reviews, dict):
+        # User reviews live in the reviews collection
+        reviews['list'] = serialize_reviews(reviews_for_game(appid))
         game['reviews'] = reviews
 
     game = enrich_with_steam_price(game)
@@ -791,11 +553,7 @@ def get_enriched_game(appid):
     # Fetch Steam details from Steam API (or use internal proxy)
     try:
         steam_url = f"https://store.steampowered.com/api/appdetails?appids={appid}"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Accept": "application/json"
-        }
-        resp = requests.get(steam_url, headers=headers, timeout=5)
+        resp = steam_get(steam_url, timeout=5, rate_timeout=5)
         if resp.status_code == 200:
             steam_data = resp.json()
             game['steam_details'] = steam_data.get(str(appid), {}).get('data', {})
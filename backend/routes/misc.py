@@ -1,10 +1,18 @@
 from flask import Blueprint, request
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from config import db
+from normalize import CANONICAL_PROJECTION, normalize_list_fields, to_field_list, with_canonical
+from ranking import with_ranking
+from review_store import reviews_collection
+from review_feed import recent_hour_count, update_feed_game
 from utils import (
     clean_doc,
     get_pagination_params,
+    get_cursor_param,
+    keyset_find,
+    count_results,
+    invalidate_counts,
     api_response,
     require_admin,
     log_action
@@ -22,8 +30,13 @@ misc_bp = Blueprint('misc_bp', __name__)
 def get_misc():
     """Public: Get all misc entries with pagination."""
     page_num, page_size, page_start = get_pagination_params()
+    sort = [("created_at", -1), ("appid", 1)]
+    after, error = get_cursor_param(sort)
+    if error:
+        return error
 
-    cursor = games_collection.find(
+    docs, next_cursor = keyset_find(
+        games_collection,
         {},
         {
             "_id": 0,
@@ -36,48 +49,34 @@ def get_misc():
             "metadata.publishers": 1,
             "playtime.peak_ccu": 1,
             "created_at": 1
-        }
-    ).sort("created_at", -1).skip(page_start).limit(page_size)
+        },
+        sort, page_start, page_size, after
+    )
 
     data_to_return = []
-    import ast
-    for doc in cursor:
-        # Parse tags if they are stringified dicts
-        tags_raw = doc.get("metadata", {}).get("tags", [])
-        tags = []
-        if tags_raw and isinstance(tags_raw, list) and len(tags_raw) > 0:
-            first = tags_raw[0]
-            if isinstance(first, str):
-                try:
-                    tag_dict = ast.literal_eval(first)
-                    if isinstance(tag_dict, dict):
-                        tags = list(tag_dict.keys())
-                    else:
-                        tags = tags_raw
-                except Exception:
-                    tags = tags_raw
-            else:
-                tags = tags_raw
+    for doc in docs:
+        lists = normalize_list_fields(doc.get("metadata"))
         structured = {
             "appid": doc.get("appid"),
             "name": doc.get("name"),
             "details": {
-                "genres": doc.get("metadata", {}).get("genres", []),
-                "tags": tags,
-                "supported_languages": doc.get("metadata", {}).get("supported_languages", [])
+                "genres": lists["genres"],
+                "tags": lists["tags"],
+                "supported_languages": lists["supported_languages"]
             },
             "stats": {"peak_ccu": doc.get("playtime", {}).get("peak_ccu", 0)},
             "companies": {
-                "developers": doc.get("metadata", {}).get("developers", []),
-                "publishers": doc.get("metadata", {}).get("publishers", [])
+                "developers": lists["developers"],
+                "publishers": lists["publishers"]
             }
         }
         data_to_return.append(structured)
     # Debug log
     print(f"[MISC ANALYTICS] Returning {len(data_to_return)} games. First: {data_to_return[0] if data_to_return else 'None'}")
 
-    total_count = games_collection.count_documents({})
-    return api_response(data_to_return, page_num, page_size, total_count)
+    total_count, estimated = count_results(games_collection)
+    return api_response(data_to_return, page_num, page_size, total_count,
+                        next_cursor=next_cursor, count_estimated=estimated)
 
 
 # ---------- GET SINGLE MISC ENTRY ----------
@@ -117,9 +116,9 @@ def post_misc():
 
     try:
         appid = int(request.form['appid'])
-        supported_languages = json.loads(request.form['supported_languages'])
-        genres = json.loads(request.form['genres'])
-        tags = json.loads(request.form['tags'])
+        supported_languages = to_field_list('supported_languages', json.loads(request.form['supported_languages']))
+        genres = to_field_list('genres', json.loads(request.form['genres']))
+        tags = to_field_list('tags', json.loads(request.form['tags']))
         peak_ccu = int(request.form['peak_ccu'])
     except Exception:
         return api_response(
@@ -136,7 +135,11 @@ def post_misc():
         'last_misc_update_at': datetime.utcnow()
     }
 
-    games_collection.update_one({'appid': appid}, {'$set': update_fields}, upsert=True)
+    # Canonical schema_version for upserted and legacy documents alike; new documents get ranking.*
+    update_fields = with_canonical(games_collection.find_one({'appid': appid}, CANONICAL_PROJECTION), update_fields)
+    result = games_collection.update_one({'appid': appid}, with_ranking(update_fields), upsert=True)
+    if result.upserted_id is not None:
+        invalidate_counts(games_collection)
     # Debug: print the full game document after update
     updated_doc = games_collection.find_one({'appid': appid})
     print(f"[MISC DEBUG] After misc update for appid {appid}: {updated_doc}")
@@ -164,7 +167,7 @@ def put_misc(appid):
         if field in request.form:
             try:
                 if field in ['supported_languages', 'genres', 'tags']:
-                    update_fields[f"metadata.{field}"] = json.loads(request.form[field])
+                    update_fields[f"metadata.{field}"] = to_field_list(field, json.loads(request.form[field]))
                 elif field == 'peak_ccu':
                     update_fields["playtime.peak_ccu"] = int(request.form[field])
             except Exception:
@@ -180,12 +183,12 @@ def put_misc(appid):
         update_fields['name'] = request.form['name']
     if 'developers' in request.form:
         try:
-            update_fields['metadata.developers'] = json.loads(request.form['developers'])
+            update_fields['metadata.developers'] = to_field_list('developers', json.loads(request.form['developers']))
         except Exception:
             return api_response({"error": "Invalid format for developers"}, status=400)
     if 'publishers' in request.form:
         try:
-            update_fields['metadata.publishers'] = json.loads(request.form['publishers'])
+            update_fields['metadata.publishers'] = to_field_list('publishers', json.loads(request.form['publishers']))
         except Exception:
             return api_response({"error": "Invalid format for publishers"}, status=400)
 
@@ -195,10 +198,17 @@ def put_misc(appid):
     update_fields["last_updated_by"] = request.user.get("username", "unknown")
     update_fields["last_updated_at"] = datetime.utcnow()
 
+    if doc is not None:
+        update_fields = with_canonical(doc, update_fields)
+
     print(f"[MISC PUT] Update fields: {update_fields}")
 
     result = games_collection.update_one({'appid': appid}, {'$set': update_fields})
     if result.matched_count == 1:
+        if update_fields.get('appid', appid) != appid:
+            # Reviews live in their own collection, keyed by the game's appid
+            reviews_collection.update_many({'appid': appid}, {'$set': {'appid': update_fields['appid']}})
+        update_feed_game(appid, name=update_fields.get('name'), new_appid=update_fields.get('appid'))
         log_action(request.user, "update", "misc", appid, update_fields, status=200)
         return api_response({"message": f"Misc entry {appid} updated successfully"}, status=200)
     else:
@@ -242,27 +252,13 @@ def get_dashboard_stats():
     Moves multiple frontend API calls into one backend endpoint.
     """
     # Total games
-    total_games = games_collection.count_documents({})
+    total_games = games_collection.estimated_document_count()
     
     # Total reviews across all games
-    pipeline_total = [
-        {'$match': {'reviews.list': {'$exists': True}}},
-        {'$project': {'review_count': {'$size': {'$ifNull': ['$reviews.list', []]}}}},
-        {'$group': {'_id': None, 'total': {'$sum': '$review_count'}}}
-    ]
-    total_reviews_result = list(games_collection.aggregate(pipeline_total))
-    total_reviews = total_reviews_result[0]['total'] if total_reviews_result else 0
+    total_reviews = reviews_collection.estimated_document_count()
     
-    # Recent reviews (last hour)
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    pipeline_recent = [
-        {'$match': {'reviews.list': {'$exists': True, '$ne': []}}},
-        {'$unwind': '$reviews.list'},
-        {'$match': {'reviews.list.created_at': {'$gte': one_hour_ago}}},
-        {'$count': 'recent_count'}
-    ]
-    recent_result = list(games_collection.aggregate(pipeline_recent))
-    recent_hour_count = recent_result[0]['recent_count'] if recent_result else 0
+    # Recent reviews (last hour), summed from the per-minute buckets
+    recent_hour_reviews = recent_hour_count()
     
     # Average price
     avg_price_pipeline = [
@@ -285,7 +281,7 @@ def get_dashboard_stats():
     return api_response({
         'total_games': total_games,
         'total_reviews': total_reviews,
-        'recent_hour_reviews': recent_hour_count,
+        'recent_hour_reviews': recent_hour_reviews,
         'average_price': avg_price,
         'top_peak_game': {
             'name': top_game['name'] if top_game else 'N/A',
@@ -1,33 +1,99 @@
+import re
 from flask import Blueprint, request
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument
 from config import db
-from utils import clean_doc, get_pagination_params, api_response, require_auth, log_action
+from review_store import (
+    REVIEWS_PAGE_SIZE, REVIEWS_MAX_PAGE_SIZE, reviews_collection, review_id_filter, is_positive,
+    review_counter_update, replace_snippet_if, stats_response, review_filter_query, review_sort,
+    reviews_for_games, serialize_review, serialize_reviews
+)
+from review_feed import feed_review, update_feed_review, unfeed_review, recent_feed, recent_hour_count
+from utils import (
+    clean_doc, get_pagination_params, get_cursor_param, keyset_find, count_results,
+    invalidate_counts, api_response, require_auth, log_action
+)
 
 games_collection = db.steamGames
 reviews_bp = Blueprint('reviews_bp', __name__)
 
-def _calc_stats(reviews_list: list):
-    total = len(reviews_list)
-    positive = sum(1 for r in reviews_list if r.get('rating', 0) >= 50)
-    negative = total - positive
-    snippet = reviews_list[-1].get('comment', '') if reviews_list else ''
-    return {
-        'reviews.num_reviews_total': total,
-        'reviews.positive': positive,
-        'reviews.negative': negative,
-        'reviews.review_snippet': snippet,
-    }
+def _update_game_counters(appid, projection=None, return_document=ReturnDocument.AFTER, **delta):
+    """Apply a review_counter_update to the game atomically. Returns the game (or None), updated by default."""
+    return games_collection.find_one_and_update(
+        {'appid': appid},
+        review_counter_update(**delta),
+        projection=projection or {'_id': 0, 'reviews': 1},
+        return_document=return_document
+    )
+
+def _review_not_found(appid):
+    if not games_collection.find_one({'appid': appid}, {'_id': 1}):
+        return api_response({"error": "Game not found"}, status=404)
+    return api_response({"error": "Review not found"}, status=404)
+
+def _ownership_filter(user: dict):
+    """Filter clause restricting a write to reviews the user may modify (admins: any)."""
+    return {} if user.get('role') == 'admin' else {'created_by': user.get('user_id')}
 
-def _serialize_reviews(reviews_list: list):
+def _write_refused(appid, review_id, action):
+    """Explain why a guarded write matched nothing: missing game/review, or not the owner."""
+    if reviews_collection.find_one({'appid': appid, **review_id_filter(review_id)}, {'_id': 1}):
+        return api_response({"error": f"Not authorized to {action} this review"}, status=403)
+    return _review_not_found(appid)
+
+def _review_page(appid, filter_type='all', sort_by=None, extended=False):
+    """
+    A game's reviews, filtered, sorted and sliced by the database. With ?pn=/?ps=
+    or ?after= only that page is read; without them the whole list comes back
+    (oldest first unless `sort_by` is given), which the game page relies on.
+    Returns (reviews, paging, error_response); `paging` holds the api_response
+    pagination arguments (empty for the whole list).
+    """
+    query = review_filter_query(appid, filter_type)
+    if not any(arg in request.args for arg in ('pn', 'ps', 'after')):
+        sort, collation = review_sort(sort_by) if sort_by else ([('created_at', 1), ('_id', 1)], None)
+        cursor = reviews_collection.find(query).sort(sort)
+        if collation:
+            cursor = cursor.collation(collation)
+        return serialize_reviews(cursor, extended), {}, None
+
+    page_num, page_size, _ = get_pagination_params()
+    if 'ps' not in request.args:
+        page_size = REVIEWS_PAGE_SIZE
+    page_size = min(page_size, REVIEWS_MAX_PAGE_SIZE)
+    sort, collation = review_sort(sort_by)
+    after, error = get_cursor_param(sort)
+    if error:
+        return None, None, error
+
+    docs, next_cursor = keyset_find(
+        reviews_collection, query, None, sort,
+        page_size * (page_num - 1), page_size, after, collation=collation
+    )
+    total_count, estimated = count_results(reviews_collection, query)
+    paging = {
+        'page_num': page_num, 'page_size': page_size, 'total_count': total_count,
+        'next_cursor': next_cursor, 'count_estimated': estimated
+    }
+    return serialize_reviews(docs, extended), paging, None
+
+def _with_game_names(reviews_list):
+    """Flatten reviews for cross-game listings, adding gameName/gameAppid (one $in query for names)."""
+    appids = list({r.get('appid') for r in reviews_list})
+    names = {
+        g['appid']: g.get('name')
+        for g in games_collection.find({'appid': {'$in': appids}}, {'_id': 0, 'appid': 1, 'name': 1})
+    }
     return [
-        {**r, '_id': str(r['_id']) if '_id' in r and r['_id'] else None}
+        {
+            **serialize_review(r),
+            'gameName': names.get(r.get('appid')) or 'Unknown Game',
+            'gameAppid': r.get('appid')
+        }
         for r in reviews_list
     ]
 
-def _user_can_modify(review_entry: dict, user: dict):
-    return user.get('role') == 'admin' or review_entry.get('created_by') == user.get('user_id')
-
 # ---------- ADD NEW REVIEW ----------
 @reviews_bp.route("/api/v1.0/games/<int:appid>/reviews", methods=['POST'])
 def post_review(appid):
@@ -35,10 +101,6 @@ def post_review(appid):
     if not all(field in request.form for field in required_fields):
         return api_response({"error": "Missing review data (comment, rating required)"}, status=400)
 
-    game = games_collection.find_one({'appid': appid})
-    if not game:
-        return api_response({"error": "Game not found"}, status=404)
-
     try:
         rating = int(request.form['rating'])
     except ValueError:
@@ -70,48 +132,47 @@ def post_review(appid):
         'created_at': datetime.utcnow()
     }
 
-    games_collection.update_one({'appid': appid}, {'$push': {'reviews.list': review_entry}})
-    updated = games_collection.find_one({'appid': appid}, {"_id": 0, "name": 1, "reviews": 1})
-    reviews_list = updated.get('reviews', {}).get('list', [])
-    stats = _calc_stats(reviews_list)
-
-    # PRESERVE Steam review data (pct_pos_total)
-    existing_reviews = game.get('reviews', {})
-    pct_pos_total = existing_reviews.get('pct_pos_total')
-    
-    update_dict = {
-        **stats,
-        'reviews.last_modified_at': datetime.utcnow(),
-        'reviews.last_modified_by': created_by
-    }
-    
-    # Include pct_pos_total if it exists
-    if pct_pos_total is not None:
-        update_dict['reviews.pct_pos_total'] = pct_pos_total
-
-    games_collection.update_one(
-        {'appid': appid},
-        {'$set': update_dict}
+    # Counters, snippet and ranking in one atomic update; doubles as the existence check.
+    # The previous snippet comes back so a failed insert can restore it.
+    game = _update_game_counters(
+        appid, {'_id': 0, 'name': 1, 'reviews.review_snippet': 1}, ReturnDocument.BEFORE,
+        delta_total=1, delta_positive=int(is_positive(rating)),
+        snippet={'$literal': review_entry['comment']}, modified_by=created_by
     )
+    if not game:
+        return api_response({"error": "Game not found"}, status=404)
+    try:
+        reviews_collection.insert_one({**review_entry, 'appid': appid})
+        invalidate_counts(reviews_collection)
+    except Exception:
+        # Undo counters and snippet so the game never reflects a review that wasn't stored
+        previous_snippet = (game.get('reviews') or {}).get('review_snippet', '')
+        _update_game_counters(
+            appid, delta_total=-1, delta_positive=-int(is_positive(rating)),
+            snippet=replace_snippet_if(review_entry['comment'], previous_snippet), modified_by=created_by
+        )
+        raise
+    feed_review(review_entry, appid, game.get('name'))
 
     log_action(request.user, "create", "review", appid, review_entry, status=201)
 
     return api_response({
         "message": "Review added successfully",
         "review": {**review_entry, '_id': str(review_entry['_id'])},
-        "game": {"appid": appid, "name": updated.get('name', 'Unknown Game')}
+        "game": {"appid": appid, "name": game.get('name', 'Unknown Game')}
     }, status=201)
 
 # ---------- GET ALL REVIEWS FOR A GAME ----------
 @reviews_bp.route("/api/v1.0/games/<int:appid>/reviews", methods=['GET'])
 def get_reviews(appid):
-    game = clean_doc(games_collection.find_one({'appid': appid}, {"_id": 0}))
+    game = clean_doc(games_collection.find_one({'appid': appid}, {"_id": 0, "name": 1, "reviews": 1}))
     if not game:
         return api_response({"error": "Game not found"}, status=404)
 
     reviews_data = game.get("reviews", {})
-    list_raw = reviews_data.get("list", [])
-    serialized_list = _serialize_reviews(list_raw)
+    serialized_list, paging, error = _review_page(appid, sort_by=request.args.get('sort'), extended=True)
+    if error:
+        return error
 
     return api_response({
         "game": {"appid": appid, "name": game.get("name")},
@@ -119,46 +180,58 @@ def get_reviews(appid):
             **{k: v for k, v in reviews_data.items() if k != "list"},
             "list": serialized_list
         }
-    })
+    }, **paging)
 
 # ---------- GET ALL REVIEWS (ALL GAMES) ----------
 @reviews_bp.route("/api/v1.0/games/reviews", methods=['GET'])
 def get_all_reviews():
     page_num, page_size, page_start = get_pagination_params()
-    cursor = games_collection.find(
+    sort = [("appid", 1)]
+    after, error = get_cursor_param(sort)
+    if error:
+        return error
+    docs, next_cursor = keyset_find(
+        games_collection,
         {"reviews": {"$exists": True}},
-        {"_id": 0, "appid": 1, "name": 1, "reviews": 1}
-    ).skip(page_start).limit(page_size)
+        {"_id": 0, "appid": 1, "name": 1, "reviews": 1},
+        sort, page_start, page_size, after
+    )
+
+    # One $in query for the whole page instead of an embedded list per game
+    page_reviews = reviews_for_games([doc.get("appid") for doc in docs])
 
     output = []
-    for doc in cursor:
+    for doc in docs:
         reviews_data = doc.get("reviews", {})
-        reviews_list = _serialize_reviews(reviews_data.get("list", []))
+        reviews_list = serialize_reviews(page_reviews.get(doc.get("appid"), []), extended=True)
         output.append({
             "appid": doc.get("appid"),
             "name": doc.get("name"),
             "reviews": {**{k: v for k, v in reviews_data.items() if k != "list"}, "list": reviews_list}
         })
 
-    total_count = games_collection.count_documents({"reviews": {"$exists": True}})
-    return api_response(output, page_num, page_size, total_count)
+    total_count, estimated = count_results(games_collection, {"reviews": {"$exists": True}})
+    return api_response(output, page_num, page_size, total_count,
+                        next_cursor=next_cursor, count_estimated=estimated)
 
 # ---------- GET GAME WITH REVIEWS ----------
 @reviews_bp.route("/api/v1.0/games/<int:appid>/with-reviews", methods=['GET'])
 def get_game_with_reviews(appid):
-    game = games_collection.find_one({'appid': appid})
+    game = games_collection.find_one({'appid': appid}, {'reviews.list': 0})
     if not game:
         return api_response({"error": "Game not found"}, status=404)
 
+    reviews_list, paging, error = _review_page(appid, sort_by=request.args.get('sort'))
+    if error:
+        return error
+
     reviews = game.get('reviews', {})
-    if isinstance(reviews, dict) and isinstance(reviews.get('list'), list):
-        reviews['list'] = [
-            {**r, '_id': str(r['_id']) if '_id' in r and r['_id'] else None}
-            for r in reviews['list']
-        ]
-        game['reviews'] = reviews
+    if not isinstance(reviews, dict):
+        reviews = {}
+    reviews['list'] = reviews_list
+    game['reviews'] = reviews
 
-    return api_response(clean_doc(game))
+    return api_response(clean_doc(game), **paging)
 
 # ---------- UPDATE REVIEW ----------
 @reviews_bp.route("/api/v1.0/games/<int:appid>/reviews", defaults={'review_id': None}, methods=['PUT'])
@@ -177,104 +250,70 @@ def put_review(appid, review_id):
     except ValueError:
         return api_response({"error": "Invalid rating value"}, status=400)
 
-    game = games_collection.find_one({'appid': appid})
-    if not game:
-        return api_response({"error": "Game not found"}, status=404)
-
-    reviews_list = game.get('reviews', {}).get('list', [])
-    target = next((r for r in reviews_list if str(r.get('_id')) == review_id), None)
-    if not target:
-        return api_response({"error": "Review not found"}, status=404)
-
-    if not _user_can_modify(target, request.user):
-        return api_response({"error": "Not authorized to edit this review"}, status=403)
-
+    changes = {'updated_at': datetime.utcnow(), 'updated_by': request.user.get('user_id')}
     if 'comment' in request.form:
-        target['comment'] = request.form['comment']
+        changes['comment'] = request.form['comment']
     if rating is not None:
-        target['rating'] = rating
-    target['updated_at'] = datetime.utcnow()
-    target['updated_by'] = request.user.get('user_id')
-
-    stats = _calc_stats(reviews_list)
-    
-    # PRESERVE Steam review data (pct_pos_total)
-    existing_reviews = game.get('reviews', {})
-    pct_pos_total = existing_reviews.get('pct_pos_total')
-    
-    update_dict = {
-        'reviews.list': reviews_list,
-        **stats,
-        'reviews.last_modified_at': datetime.utcnow(),
-        'reviews.last_modified_by': request.user.get('user_id')
-    }
-    
-    # Include pct_pos_total if it exists
-    if pct_pos_total is not None:
-        update_dict['reviews.pct_pos_total'] = pct_pos_total
-    
-    games_collection.update_one(
-        {'appid': appid},
-        {'$set': update_dict}
+        changes['rating'] = rating
+
+    # Ownership is part of the filter, so check-and-write is one atomic operation;
+    # the previous version comes back for the counter deltas
+    target = reviews_collection.find_one_and_update(
+        {'appid': appid, **review_id_filter(review_id), **_ownership_filter(request.user)},
+        {'$set': changes},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not target:
+        return _write_refused(appid, review_id, "edit")
+    update_feed_review(target['_id'], changes)
+
+    # Rating delta moves the review between positive and negative; total is unchanged
+    delta_positive = int(is_positive(changes.get('rating', target.get('rating')))) - int(is_positive(target.get('rating')))
+    if delta_positive:
+        invalidate_counts(reviews_collection)  # the review moved between the positive/negative filters
+    snippet = replace_snippet_if(target.get('comment'), changes['comment']) if 'comment' in changes else None
+    game = _update_game_counters(
+        appid, delta_positive=delta_positive, snippet=snippet, modified_by=request.user.get('user_id')
     )
+    stats = stats_response(game)
+    target.update(changes)
 
     log_action(request.user, "update", "review", appid, {"review_id": review_id}, status=200)
 
-    # Serialize the target review's _id
-    serialized_target = {**target, '_id': str(target['_id']) if '_id' in target and target['_id'] else None}
-
     return api_response({
         "message": "Review updated successfully",
-        "review": serialized_target,
-        "reviews": {**{k: v for k, v in stats.items()}, "list": _serialize_reviews(reviews_list)}
+        "review": serialize_review(target),
+        "reviews": {**{k: v for k, v in stats.items()}, "list": _review_page(appid)[0]}
     }, status=200)
 
 # ---------- DELETE REVIEW ----------
 @reviews_bp.route("/api/v1.0/games/<int:appid>/reviews/<string:review_id>", methods=['DELETE'])
 @require_auth
 def delete_review(appid, review_id):
-    game = games_collection.find_one({'appid': appid})
-    if not game:
-        return api_response({"error": "Game not found"}, status=404)
-
-    reviews_list = game.get('reviews', {}).get('list', [])
-    idx = next((i for i, r in enumerate(reviews_list) if str(r.get('_id')) == review_id), None)
-    if idx is None:
-        return api_response({"error": "Review not found"}, status=404)
-
-    target = reviews_list[idx]
-    if not _user_can_modify(target, request.user):
-        return api_response({"error": "Not authorized to delete this review"}, status=403)
-
-    reviews_list.pop(idx)
-    stats = _calc_stats(reviews_list)
-    
-    # PRESERVE Steam review data (pct_pos_total)
-    existing_reviews = game.get('reviews', {})
-    pct_pos_total = existing_reviews.get('pct_pos_total')
-    
-    update_dict = {
-        'reviews.list': reviews_list,
-        **stats,
-        'reviews.last_modified_at': datetime.utcnow(),
-        'reviews.last_modified_by': request.user.get('user_id')
-    }
-    
-    # Include pct_pos_total if it exists
-    if pct_pos_total is not None:
-        update_dict['reviews.pct_pos_total'] = pct_pos_total
-
-    games_collection.update_one(
-        {'appid': appid},
-        {'$set': update_dict}
+    target = reviews_collection.find_one_and_delete(
+        {'appid': appid, **review_id_filter(review_id), **_ownership_filter(request.user)},
+        projection={'rating': 1, 'comment': 1, 'created_at': 1}
     )
+    if not target:
+        return _write_refused(appid, review_id, "delete")
+    invalidate_counts(reviews_collection)
+    unfeed_review(target)
+
+    # If the deleted review was the snippet, fall back to the newest remaining comment
+    newest = reviews_collection.find_one({'appid': appid}, {'_id': 0, 'comment': 1}, sort=[('created_at', -1)])
+    game = _update_game_counters(
+        appid, delta_total=-1, delta_positive=-int(is_positive(target.get('rating'))),
+        snippet=replace_snippet_if(target.get('comment'), (newest or {}).get('comment', '')),
+        modified_by=request.user.get('user_id')
+    )
+    stats = stats_response(game)
 
     log_action(request.user, "delete", "review", appid, {"review_id": review_id}, status=200)
 
     return api_response({
         "message": f"Review {review_id} deleted successfully",
         "deleted_by": request.user.get('username', 'unknown'),
-        "reviews": {**{k: v for k, v in stats.items()}, "list": _serialize_reviews(reviews_list)}
+        "reviews": {**{k: v for k, v in stats.items()}, "list": _review_page(appid)[0]}
     }, status=200)
 
 
@@ -290,7 +329,6 @@ def get_review_stats(appid):
         return api_response({"error": "Game not found"}, status=404)
     
     reviews_data = game.get('reviews', {})
-    reviews_list = reviews_data.get('list', [])
     
     positive = reviews_data.get('positive', 0)
     negative = reviews_data.get('negative', 0)
@@ -300,33 +338,32 @@ def get_review_stats(appid):
     positive_pct = round((positive / total * 100), 2) if total > 0 else 0
     negative_pct = round((negative / total * 100), 2) if total > 0 else 0
     
-    # Rating distribution
-    rating_distribution = {
-        '0-20': 0,
-        '21-40': 0,
-        '41-60': 0,
-        '61-80': 0,
-        '81-100': 0
-    }
-    
-    for review in reviews_list:
-        rating = review.get('rating', 0)
-        if rating <= 20:
-            rating_distribution['0-20'] += 1
-        elif rating <= 40:
-            rating_distribution['21-40'] += 1
-        elif rating <= 60:
-            rating_distribution['41-60'] += 1
-        elif rating <= 80:
-            rating_distribution['61-80'] += 1
-        else:
-            rating_distribution['81-100'] += 1
+    # Rating distribution and average, computed in the database
+    buckets = ['0-20', '21-40', '41-60', '61-80', '81-100']
+    rating = {'$ifNull': ['$rating', 0]}
+    result = list(reviews_collection.aggregate([
+        {'$match': {'appid': appid}},
+        {'$group': {
+            '_id': {'$switch': {
+                'branches': [
+                    {'case': {'$lte': [rating, 20]}, 'then': '0-20'},
+                    {'case': {'$lte': [rating, 40]}, 'then': '21-40'},
+                    {'case': {'$lte': [rating, 60]}, 'then': '41-60'},
+                    {'case': {'$lte': [rating, 80]}, 'then': '61-80'},
+                ],
+                'default': '81-100'
+            }},
+            'count': {'$sum': 1},
+            'rating_sum': {'$sum': rating}
+        }}
+    ]))
+    rating_distribution = {bucket: 0 for bucket in buckets}
+    for row in result:
+        rating_distribution[row['_id']] = row['count']
     
     # Average rating
-    avg_rating = 0
-    if reviews_list:
-        total_rating = sum(r.get('rating', 0) for r in reviews_list)
-        avg_rating = round(total_rating / len(reviews_list), 2)
+    count = sum(row['count'] for row in result)
+    avg_rating = round(sum(row['rating_sum'] for row in result) / count, 2) if count else 0
     
     return api_response({
         'game': {'appid': appid, 'name': game.get('name', 'Unknown')},
@@ -346,41 +383,29 @@ def get_review_stats(appid):
 @reviews_bp.route("/api/v1.0/games/<int:appid>/reviews/filtered", methods=['GET'])
 def get_filtered_reviews(appid):
     """
-    Get filtered and sorted reviews for a game.
+    Get filtered and sorted reviews for a game, one page at a time (?pn=/?ps= or ?after=).
     Moves filtering/sorting logic from frontend to backend.
     """
-    game = games_collection.find_one({'appid': appid}, {'reviews': 1, 'name': 1})
+    game = games_collection.find_one({'appid': appid}, {'name': 1})
     if not game:
         return api_response({"error": "Game not found"}, status=404)
     
-    reviews_data = game.get('reviews', {})
-    reviews_list = reviews_data.get('list', [])
-    
     # Get filter and sort params
     filter_type = request.args.get('filter', 'all')  # all, positive, negative
     sort_by = request.args.get('sort', 'date')  # date, rating, username
     
-    # Filter reviews
-    if filter_type == 'positive':
-        reviews_list = [r for r in reviews_list if r.get('rating', 0) >= 50]
-    elif filter_type == 'negative':
-        reviews_list = [r for r in reviews_list if r.get('rating', 0) < 50]
-    
-    # Sort reviews
-    if sort_by == 'rating':
-        reviews_list = sorted(reviews_list, key=lambda x: x.get('rating', 0), reverse=True)
-    elif sort_by == 'username':
-        reviews_list = sorted(reviews_list, key=lambda x: x.get('username', '').lower())
-    else:  # date
-        reviews_list = sorted(reviews_list, key=lambda x: x.get('created_at', datetime.min), reverse=True)
+    # Filter, sort and slice in the query
+    reviews_list, paging, error = _review_page(appid, filter_type, sort_by)
+    if error:
+        return error
     
     return api_response({
         'game': {'appid': appid, 'name': game.get('name', 'Unknown')},
         'filter': filter_type,
         'sort': sort_by,
-        'count': len(reviews_list),
-        'reviews': _serialize_reviews(reviews_list)
-    })
+        'count': paging['total_count'] if paging else len(reviews_list),
+        'reviews': reviews_list
+    }, **paging)
 
 
 # ---------- GET RECENT REVIEWS (ALL GAMES) ----------
@@ -393,42 +418,21 @@ def get_recent_reviews():
     """
     limit = int(request.args.get('limit', 6))
     
-    # Aggregation to get all reviews from all games
-    pipeline = [
-        {'$match': {'reviews.list': {'$exists': True, '$ne': []}}},
-        {'$unwind': '$reviews.list'},
-        {'$project': {
-            '_id': 0,
-            'appid': 1,
-            'name': 1,
-            'review': '$reviews.list'
-        }},
-        {'$sort': {'review.created_at': -1}},
-        {'$limit': 100}  # Get more for hour calculation
+    # Tail of the recent_reviews feed; game names are stored with each entry
+    feed = recent_feed()
+    all_reviews = [
+        {
+            **serialize_review(r),
+            'gameName': r.get('gameName') or 'Unknown Game',
+            'gameAppid': r.get('appid')
+        }
+        for r in feed[:limit]
     ]
     
-    results = list(games_collection.aggregate(pipeline))
-    
-    # Flatten and enrich reviews
-    all_reviews = []
-    for item in results:
-        review = item.get('review', {})
-        all_reviews.append({
-            **review,
-            '_id': str(review.get('_id')) if review.get('_id') else None,
-            'gameName': item.get('name', 'Unknown Game'),
-            'gameAppid': item.get('appid')
-        })
-    
-    # Calculate reviews in last hour
-    from datetime import timedelta
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    recent_count = sum(1 for r in all_reviews if r.get('created_at') and r['created_at'] >= one_hour_ago)
-    
     return api_response({
-        'reviews': all_reviews[:limit],
-        'total_count': len(all_reviews),
-        'recent_hour_count': recent_count
+        'reviews': all_reviews,
+        'total_count': len(feed),
+        'recent_hour_count': recent_hour_count()
     })
 
 
@@ -439,54 +443,30 @@ def get_admin_reviews():
     Get all reviews with server-side search and pagination.
     Moves admin search/filter logic from frontend to backend.
     """
-    from utils import require_auth
-    
     # Get pagination params
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 20))
+    page = max(int(request.args.get('page', 1)), 1)
+    per_page = max(int(request.args.get('per_page', 20)), 1)
     search = request.args.get('search', '').strip()
     
-    # Aggregation to flatten all reviews
-    pipeline = [
-        {'$match': {'reviews.list': {'$exists': True, '$ne': []}}},
-        {'$unwind': '$reviews.list'},
-        {'$project': {
-            '_id': 0,
-            'appid': 1,
-            'name': 1,
-            'review': '$reviews.list'
-        }}
-    ]
-    
-    results = list(games_collection.aggregate(pipeline))
-    
-    # Flatten reviews
-    all_reviews = []
-    for item in results:
-        review = item.get('review', {})
-        all_reviews.append({
-            **review,
-            '_id': str(review.get('_id')) if review.get('_id') else None,
-            'gameName': item.get('name', 'Unknown Game'),
-            'gameAppid': item.get('appid')
-        })
-    
-    # Server-side search filtering
+    # Server-side search: username, comment, or the reviewed game's name
+    query = {}
     if search:
-        search_lower = search.lower()
-        all_reviews = [
-            r for r in all_reviews
-            if (r.get('username', '').lower().find(search_lower) >= 0 or
-                r.get('comment', '').lower().find(search_lower) >= 0 or
-                r.get('gameName', '').lower().find(search_lower) >= 0)
-        ]
+        pattern = {'$regex': re.escape(search), '$options': 'i'}
+        game_appids = games_collection.distinct('appid', {'name': pattern})
+        query = {'$or': [
+            {'username': pattern},
+            {'comment': pattern},
+            {'appid': {'$in': game_appids}}
+        ]}
     
     # Calculate pagination
-    total_count = len(all_reviews)
+    total_count = reviews_collection.count_documents(query)
     total_pages = max(1, (total_count + per_page - 1) // per_page)
     start = (page - 1) * per_page
-    end = start + per_page
-    paginated = all_reviews[start:end]
+    page_reviews = list(
+        reviews_collection.find(query).sort([('appid', 1), ('created_at', 1)]).skip(start).limit(per_page)
+    )
+    paginated = _with_game_names(page_reviews)
     
     return api_response({
         'reviews': paginated,
@@ -497,5 +477,3 @@ def get_admin_reviews():
             'total_pages': total_pages
         }
     })
-
-
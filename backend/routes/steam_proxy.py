@@ -1,34 +1,46 @@
 import time
+import threading
 import requests
-from flask import Blueprint, jsonify, request, make_response
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import Blueprint, jsonify, request
+from config import STEAM_BATCH_CONCURRENCY, STEAM_BATCH_DEADLINE, STEAM_CACHE_STALE_GRACE
+from steam_cache import SingleFlight
+from steam_client import SteamRateLimited, SteamUnavailable, steam_client_stats, steam_get, steam_response_cache
+from utils import json_response
 
 steam_proxy_bp = Blueprint("steam_proxy", __name__)
 
 # Cache configuration
 CACHE_TTL = 60 * 60  # 1 hour (3600 seconds)
-_cache = {}  # {cache_key: (expires_at, payload)}
+# Size-bounded LRU shared across worker processes (see steam_cache.py / steam_client.py)
+_cache = steam_response_cache
 
-def cleanup_expired_cache():
-    """Remove expired entries from cache to prevent memory bloat"""
-    now = time.time()
-    expired_keys = [key for key, (expires_at, _) in _cache.items() if expires_at <= now]
-    for key in expired_keys:
-        del _cache[key]
+# Concurrent misses for the same key share one upstream fetch
+_inflight = SingleFlight()
 
-def cached_request(cache_key: str, url: str, params: dict = None, headers: dict = None, ttl: int = CACHE_TTL):
-    """Generic cached HTTP request helper"""
+# Background refreshes of stale entries (stale-while-revalidate)
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="steam-refresh")
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+# Bounded concurrency for /api/steam/batch
+_batch_pool = ThreadPoolExecutor(max_workers=STEAM_BATCH_CONCURRENCY, thread_name_prefix="steam-batch")
+
+DETAILS_URL = "https://store.steampowered.com/api/appdetails"
+DETAILS_FILTERS = "basic,movies,screenshots,price_overview,developers,publishers,genres,release_date,achievements"
+_DETAILS_FILTER_SET = set(DETAILS_FILTERS.split(","))
+
+def _fetch_and_store(cache_key: str, url: str, params: dict, headers: dict, ttl: int):
+    """
+    Fetch from upstream and cache successful responses. Returns (payload, ttl, cache_status).
+    On upstream failure the previous entry is left untouched, so stale data stays available.
+    """
+    # Another worker process may have filled the shared tier while we waited
     now = time.time()
-    
-    # Cleanup expired cache periodically
-    if len(_cache) > 100 and int(now) % 100 == 0:
-        cleanup_expired_cache()
-    
-    # Check cache first
     cached = _cache.get(cache_key)
     if cached and cached[0] > now:
-        return cached[1], True, int(cached[0] - now)
-    
-    # Fetch from API
+        return cached[1], int(cached[0] - now), 'HIT'
+
     default_headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
         "Accept": "application/json",
@@ -37,18 +49,97 @@ def cached_request(cache_key: str, url: str, params: dict = None, headers: dict
         default_headers.update(headers)
     
     try:
-        resp = requests.get(url, params=params, headers=default_headers, timeout=8)
+        resp = steam_get(url, params=params, headers=default_headers, timeout=8, rate_timeout=5)
         if resp.status_code != 200:
-            return {"error": "api_fetch_failed", "status": resp.status_code}, False, 0
+            return {"error": "api_fetch_failed", "status": resp.status_code}, 0, 'MISS'
         
         data = resp.json()
-        _cache[cache_key] = (now + ttl, data)
-        return data, False, ttl
+        _cache.set(cache_key, data, now + ttl)
+        return data, ttl, 'MISS'
     
+    except SteamUnavailable:
+        return {"error": "api_unavailable"}, 0, 'MISS'
+    except SteamRateLimited:
+        return {"error": "api_rate_limited"}, 0, 'MISS'
     except requests.Timeout:
-        return {"error": "api_request_timeout"}, False, 0
+        return {"error": "api_request_timeout"}, 0, 'MISS'
     except requests.RequestException as e:
-        return {"error": "api_request_failed", "message": str(e)}, False, 0
+        return {"error": "api_request_failed", "message": str(e)}, 0, 'MISS'
+
+def _schedule_refresh(cache_key: str, url: str, params: dict, headers: dict, ttl: int):
+    """Refresh a stale entry in the background (at most one refresh per key at a time)."""
+    with _refresh_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+
+    def refresh():
+        try:
+            _inflight.do(cache_key, lambda: _fetch_and_store(cache_key, url, params, headers, ttl))
+        except Exception as e:
+            print(f"[STEAM PROXY] background refresh failed for {cache_key}: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(cache_key)
+
+    _refresh_pool.submit(refresh)
+
+def cached_request(cache_key: str, url: str, params: dict = None, headers: dict = None, ttl: int = CACHE_TTL):
+    """
+    Generic cached HTTP request helper. Returns (payload, cache_status, ttl) where
+    cache_status is HIT, MISS or STALE (expired entry within the grace window,
+    served immediately while a background refresh runs).
+    """
+    now = time.time()
+    
+    # Check cache first
+    cached = _cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1], 'HIT', int(cached[0] - now)
+
+    if cached and cached[0] + STEAM_CACHE_STALE_GRACE > now:
+        _schedule_refresh(cache_key, url, params, headers, ttl)
+        return cached[1], 'STALE', 0
+    
+    # Fetch from API (one upstream call per key, concurrent callers wait for it)
+    (data, fresh_ttl, cache_status), _ = _inflight.do(
+        cache_key, lambda: _fetch_and_store(cache_key, url, params, headers, ttl)
+    )
+    return data, cache_status, fresh_ttl
+
+def cached_details(appid: int, filters: str = DETAILS_FILTERS):
+    """
+    appdetails for `filters` served from the single details_{appid} entry.
+    Any subset of DETAILS_FILTERS is projected out of the cached superset, so a
+    game page costs one upstream fetch no matter how many sub-resources it loads.
+    Returns (payload, cache_status, ttl) like cached_request.
+    """
+    wanted = [f.strip() for f in filters.split(",") if f.strip()]
+    params = {"appids": appid, "filters": DETAILS_FILTERS}
+    if not set(wanted) <= _DETAILS_FILTER_SET:
+        # Not covered by the superset: cache the exact upstream request separately
+        params["filters"] = ",".join(wanted)
+        return cached_request(f"details_{appid}_{params['filters']}", DETAILS_URL, params)
+
+    data, cache_status, ttl = cached_request(f"details_{appid}", DETAILS_URL, params)
+    if set(wanted) == _DETAILS_FILTER_SET:
+        return data, cache_status, ttl
+    return _project_details(data, appid, wanted), cache_status, ttl
+
+def _project_details(payload, appid, fields):
+    """Cut an appdetails payload down to `fields`, keeping Steam's {appid: {success, data}} shape."""
+    entry = payload.get(str(appid)) if isinstance(payload, dict) else None
+    if not isinstance(entry, dict):
+        return payload  # error payloads pass through unchanged
+    data = entry.get("data")
+    if isinstance(data, dict):
+        # Every filter except "basic" maps 1:1 to a data key; "basic" is everything else
+        dropped = _DETAILS_FILTER_SET - {"basic"} - set(fields)
+        if "basic" in fields:
+            data = {k: v for k, v in data.items() if k not in dropped}
+        else:
+            data = {k: v for k, v in data.items() if k in fields}
+    return {str(appid): {**entry, "data": data} if "data" in entry else entry}
 
 @steam_proxy_bp.route("/api/steam/<int:appid>")
 def steam_details(appid: int):
@@ -57,16 +148,10 @@ def steam_details(appid: int):
     Avoids CORS issues and reduces API calls.
     Returns cache status in response headers.
     """
-    url = "https://store.steampowered.com/api/appdetails"
-    params = {
-        "appids": appid,
-        "filters": "basic,movies,screenshots,price_overview,developers,publishers,genres,release_date,achievements",
-    }
-    
-    data, is_cached, ttl = cached_request(f"details_{appid}", url, params)
+    data, cache_status, ttl = cached_details(appid)
     
-    response = make_response(jsonify(data))
-    response.headers['X-Cache-Status'] = 'HIT' if is_cached else 'MISS'
+    response = json_response(data)
+    response.headers['X-Cache-Status'] = cache_status
     response.headers['X-Cache-TTL'] = str(ttl)
     response.headers['Cache-Control'] = f'public, max-age={ttl}'
     return response
@@ -74,13 +159,10 @@ def steam_details(appid: int):
 @steam_proxy_bp.route("/api/steam/<int:appid>/screenshots")
 def steam_screenshots(appid: int):
     """Get Steam screenshots for a game"""
-    url = "https://store.steampowered.com/api/appdetails"
-    params = {"appids": appid, "filters": "screenshots"}
-    
-    data, is_cached, ttl = cached_request(f"screenshots_{appid}", url, params)
+    data, cache_status, ttl = cached_details(appid, "screenshots")
     
-    response = make_response(jsonify(data))
-    response.headers['X-Cache-Status'] = 'HIT' if is_cached else 'MISS'
+    response = json_response(data)
+    response.headers['X-Cache-Status'] = cache_status
     response.headers['X-Cache-TTL'] = str(ttl)
     response.headers['Cache-Control'] = f'public, max-age={ttl}'
     return response
@@ -88,13 +170,10 @@ def steam_screenshots(appid: int):
 @steam_proxy_bp.route("/api/steam/<int:appid>/trailers")
 def steam_trailers(appid: int):
     """Get Steam trailers/movies for a game"""
-    url = "https://store.steampowered.com/api/appdetails"
-    params = {"appids": appid, "filters": "movies"}
+    data, cache_status, ttl = cached_details(appid, "movies")
     
-    data, is_cached, ttl = cached_request(f"trailers_{appid}", url, params)
-    
-    response = make_response(jsonify(data))
-    response.headers['X-Cache-Status'] = 'HIT' if is_cached else 'MISS'
+    response = json_response(data)
+    response.headers['X-Cache-Status'] = cache_status
     response.headers['X-Cache-TTL'] = str(ttl)
     response.headers['Cache-Control'] = f'public, max-age={ttl}'
     return response
@@ -106,10 +185,10 @@ def steam_achievements(appid: int):
     url = "https://api.steampowered.com/ISteamUserStats/GetSchemaForGame/v2/"
     params = {"key": steam_api_key, "appid": appid}
     
-    data, is_cached, ttl = cached_request(f"achievements_{appid}", url, params)
+    data, cache_status, ttl = cached_request(f"achievements_{appid}", url, params)
     
-    response = make_response(jsonify(data))
-    response.headers['X-Cache-Status'] = 'HIT' if is_cached else 'MISS'
+    response = json_response(data)
+    response.headers['X-Cache-Status'] = cache_status
     response.headers['X-Cache-TTL'] = str(ttl)
     response.headers['Cache-Control'] = f'public, max-age={ttl}'
     return response
@@ -120,10 +199,10 @@ def steam_achievement_percentages(appid: int):
     url = "https://api.steampowered.com/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2/"
     params = {"gameid": appid}
     
-    data, is_cached, ttl = cached_request(f"ach_pct_{appid}", url, params)
+    data, cache_status, ttl = cached_request(f"ach_pct_{appid}", url, params)
     
-    response = make_response(jsonify(data))
-    response.headers['X-Cache-Status'] = 'HIT' if is_cached else 'MISS'
+    response = json_response(data)
+    response.headers['X-Cache-Status'] = cache_status
     response.headers['X-Cache-TTL'] = str(ttl)
     response.headers['Cache-Control'] = f'public, max-age={ttl}'
     return response
@@ -137,10 +216,10 @@ def steam_search():
     
     url = f"https://steamcommunity.com/actions/SearchApps/{requests.utils.quote(name)}"
     
-    data, is_cached, ttl = cached_request(f"search_{name}", url, ttl=300)  # 5 min cache for searches
+    data, cache_status, ttl = cached_request(f"search_{name}", url, ttl=300)  # 5 min cache for searches
     
-    response = make_response(jsonify(data))
-    response.headers['X-Cache-Status'] = 'HIT' if is_cached else 'MISS'
+    response = json_response(data)
+    response.headers['X-Cache-Status'] = cache_status
     response.headers['X-Cache-TTL'] = str(ttl)
     response.headers['Cache-Control'] = f'public, max-age={ttl}'
     return response
@@ -157,6 +236,18 @@ def steam_images(appid: int):
     })
 
 
+@steam_proxy_bp.route("/api/steam/cache/stats")
+def steam_cache_stats():
+    """Report size, entry counts and hit rates of the Steam proxy cache"""
+    return json_response(_cache.stats())
+
+
+@steam_proxy_bp.route("/api/steam/client/stats")
+def steam_http_stats():
+    """Report upstream request counts, retries, circuit breaker state and latency"""
+    return json_response(steam_client_stats())
+
+
 @steam_proxy_bp.route("/api/steam/batch", methods=['POST'])
 def steam_batch():
     """
@@ -165,6 +256,8 @@ def steam_batch():
     
     POST body: { "appids": [730, 570, 440] }
     Returns: { "730": {...}, "570": {...}, "440": {...} }
+    With ?include_status=1: { "results": {...}, "status": {"730": "HIT", "570": "PENDING", ...} }
+    Appids not fetched within STEAM_BATCH_DEADLINE come back as {"error": "deadline_exceeded"}.
     """
     data = request.get_json()
     if not data or 'appids' not in data:
@@ -177,40 +270,37 @@ def steam_batch():
     if len(appids) > 50:
         return jsonify({"error": "Maximum 50 appids per request"}), 400
     
+    # Fetch in parallel (cache hits return immediately, misses share the global rate limit)
+    futures = {}
+    for appid in dict.fromkeys(str(a) for a in appids):
+        futures[appid] = _batch_pool.submit(cached_details, appid)
+
+    # Return whatever is ready by the deadline; stragglers keep running and land in the cache
+    wait(futures.values(), timeout=STEAM_BATCH_DEADLINE)
+
     results = {}
-    url_template = "https://store.steampowered.com/api/appdetails"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Accept": "application/json"
-    }
-    
-    for appid in appids:
-        now = time.time()
-        cache_key = f"details_{appid}"
-        
-        # Check cache
-        cached = _cache.get(cache_key)
-        if cached and cached[0] > now:
-            results[str(appid)] = cached[1]
+    statuses = {}
+    for appid, future in futures.items():
+        if not future.done():
+            results[appid] = {"error": "deadline_exceeded", "retry": True}
+            statuses[appid] = 'PENDING'
             continue
-        
-        # Fetch from Steam
         try:
-            params = {
-                "appids": appid,
-                "filters": "basic,movies,screenshots,price_overview,developers,publishers,genres,release_date,achievements"
-            }
-            resp = requests.get(url_template, params=params, headers=headers, timeout=5)
-            if resp.status_code == 200:
-                data = resp.json()
-                _cache[cache_key] = (now + CACHE_TTL, data)
-                results[str(appid)] = data
-            else:
-                results[str(appid)] = {"error": "fetch_failed"}
-            
-            time.sleep(0.1)  # Rate limiting
+            data, cache_status, _ = future.result()
         except Exception as e:
-            results[str(appid)] = {"error": str(e)}
-    
-    return jsonify(results)
+            data, cache_status = {"error": str(e)}, 'ERROR'
+        if isinstance(data, dict) and 'error' in data:
+            cache_status = 'ERROR'
+        results[appid] = data
+        statuses[appid] = cache_status
+
+    summary = {}
+    for cache_status in statuses.values():
+        summary[cache_status] = summary.get(cache_status, 0) + 1
+
+    body = {"results": results, "status": statuses} if request.args.get('include_status') else results
+    response = json_response(body)
+    response.headers['X-Batch-Status'] = ";".join(f"{k.lower()}={v}" for k, v in sorted(summary.items()))
+    return response
+
 
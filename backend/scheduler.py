@@ -0,0 +1,284 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from config import db, SCHEDULER_LEASE_SECONDS, SCHEDULER_POLL_SECONDS
+
+# ============================================================
+# PERIODIC JOB SCHEDULER
+# ============================================================
+#
+# One process (scripts/run_scheduler.py) runs every registered maintenance
+# job on its cron schedule. Any number of nodes can run the scheduler:
+#   - job_locks holds a renewable lease per job, so only one node runs it
+#   - jobs that call Steam also take the shared "steam" lease, so at most one
+#     node spends the Steam budget at a time; on that node, jobs run one after
+#     another and draw from the same in-process rate limiter
+#   - every run is recorded in job_runs (duration, items, items/s, report)
+
+job_locks_col = db.job_locks
+job_runs_col = db.job_runs
+
+STEAM_LEASE = "steam"
+
+NODE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+# ============================================================
+# CRON EXPRESSIONS
+# ============================================================
+
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]  # minute hour day month weekday (0 = Sunday)
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = end = int(part)
+            if step > 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"cron field '{text}' out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Standard 5-field cron expression ("*/15 * * * *"), evaluated in UTC."""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(text, low, high) for text, (low, high) in zip(fields, _FIELD_RANGES)
+        )
+        # cron semantics: if both day fields are restricted, either may match
+        self._any_day = fields[2] == "*" or fields[4] == "*"
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.isoweekday() % 7) in self.weekdays
+        return (day_ok and weekday_ok) if self._any_day else (day_ok or weekday_ok)
+
+    def next_after(self, moment):
+        """First matching minute strictly after `moment`."""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"cron expression never matches: '{self.expression}'")
+
+
+# ============================================================
+# MONGO LEASES
+# ============================================================
+
+def acquire_lease(name, ttl=SCHEDULER_LEASE_SECONDS):
+    """Take or renew the lease `name` for this node. Returns True if we hold it."""
+    now = datetime.utcnow()
+    try:
+        job_locks_col.find_one_and_update(
+            {"_id": name, "$or": [{"expires_at": {"$lte": now}}, {"owner": NODE_ID}]},
+            {"$set": {"owner": NODE_ID, "expires_at": now + timedelta(seconds=ttl), "renewed_at": now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return True
+    except DuplicateKeyError:
+        return False  # held by another node (the upsert collided with its lock document)
+
+
+def release_lease(name):
+    job_locks_col.update_one({"_id": name, "owner": NODE_ID}, {"$set": {"expires_at": datetime.utcnow()}})
+
+
+class _LeaseKeeper:
+    """
+    Renews a set of leases in the background while a job runs. If another node
+    takes one over, `lost` is set so the job can stop at its next batch boundary.
+    """
+
+    def __init__(self, names, ttl=SCHEDULER_LEASE_SECONDS):
+        self.names = names
+        self.ttl = ttl
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.ttl / 3):
+            for name in self.names:
+                try:
+                    if not acquire_lease(name, self.ttl):
+                        print(f"[SCHEDULER ERROR] lost lease '{name}' while running; stopping the job")
+                        self.lost.set()
+                        return
+                except PyMongoError as e:
+                    print(f"[SCHEDULER ERROR] renewing lease '{name}': {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        for name in self.names:
+            release_lease(name)
+
+
+# ============================================================
+# JOB REGISTRY AND RUNNER
+# ============================================================
+
+class Job:
+    """
+    A registered job. `run(stop)` returns a report dict; `stop` is an Event set
+    when the job's lease is lost, which long jobs check between batches.
+    `items_key` names the report["stats"] counter used for throughput.
+    """
+
+    def __init__(self, name, schedule, run, items_key=None, uses_steam=False):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.run = run
+        self.items_key = items_key
+        self.uses_steam = uses_steam
+
+
+JOBS = {}
+
+
+def register_job(name, schedule, run, items_key=None, uses_steam=False):
+    JOBS[name] = Job(name, schedule, run, items_key, uses_steam)
+    return JOBS[name]
+
+
+def run_job(job):
+    """
+    Run one job under its lease(s) and record the run. Returns the job_runs
+    document, or None if another node holds a lease.
+    """
+    leases = [job.name] + ([STEAM_LEASE] if job.uses_steam else [])
+    held = []
+    for name in leases:
+        if not acquire_lease(name):
+            for taken in held:
+                release_lease(taken)
+            print(f"[SCHEDULER] {job.name}: lease '{name}' held by another node, skipping")
+            return None
+        held.append(name)
+
+    started_at = datetime.utcnow()
+    started = time.time()
+    status, report, error = "ok", None, None
+    with _LeaseKeeper(held) as keeper:
+        try:
+            report = job.run(keeper.lost) or {}
+        except Exception as e:
+            status, error = "error", str(e)
+            print(f"[SCHEDULER ERROR] {job.name}: {e}")
+        if keeper.lost.is_set() and status == "ok":
+            status, error = "lost_lease", "lease taken over by another node; job stopped early"
+
+    duration = time.time() - started
+    items = (report or {}).get("stats", {}).get(job.items_key) if job.items_key else None
+    run = {
+        "job": job.name,
+        "node": NODE_ID,
+        "status": status,
+        "started_at": started_at,
+        "finished_at": datetime.utcnow(),
+        "duration_seconds": round(duration, 2),
+        "items": items,
+        "items_per_second": round(items / max(duration, 1e-6), 2) if items is not None else None,
+        "report": report,
+        "error": error,
+    }
+    try:
+        job_runs_col.insert_one(run)
+    except PyMongoError as e:
+        print(f"[SCHEDULER ERROR] recording run of {job.name}: {e}")
+    print(f"[SCHEDULER] {job.name} {status} in {duration:.1f}s ({items if items is not None else '-'} items)")
+    return run
+
+
+def run_forever(jobs=None, poll_seconds=SCHEDULER_POLL_SECONDS):
+    """Run `jobs` (default: all registered) on their schedules. Jobs run one at a time on this node."""
+    jobs = list(jobs or JOBS.values())
+    now = datetime.utcnow()
+    next_runs = {job.name: job.schedule.next_after(now) for job in jobs}
+    for job in jobs:
+        print(f"[SCHEDULER] {job.name} ({job.schedule.expression}) next at {next_runs[job.name]:%Y-%m-%d %H:%M} UTC")
+
+    while True:
+        for job in sorted(jobs, key=lambda j: next_runs[j.name]):
+            now = datetime.utcnow()
+            if next_runs[job.name] > now:
+                continue
+            try:
+                run_job(job)
+            except PyMongoError as e:
+                print(f"[SCHEDULER ERROR] {job.name}: {e}")
+            next_runs[job.name] = job.schedule.next_after(datetime.utcnow())
+        time.sleep(poll_seconds)
+
+
+def recent_runs(job_name=None, limit=20):
+    query = {"job": job_name} if job_name else {}
+    return list(job_runs_col.find(query, {"_id": 0}).sort("started_at", -1).limit(limit))
+
+
+# ============================================================
+# REGISTERED JOBS
+# ============================================================
+
+def _price_refresh(stop):
+    from prices import refresh_catalog_prices
+    return refresh_catalog_prices(stop=stop)
+
+
+def _language_backfill(stop):
+    from enrichment import backfill_supported_languages
+    return backfill_supported_languages(stop=stop)
+
+
+def _review_feed_rebuild(stop):
+    from review_feed import rebuild_review_feed
+    return rebuild_review_feed()
+
+
+def _ranking_rebuild(stop):
+    from ranking import refresh_ranking
+    result = refresh_ranking(db.steamGames)
+    return {"job": "ranking_rebuild", "stats": {"matched": result.matched_count, "modified": result.modified_count}}
+
+
+register_job("price_refresh", "0 */6 * * *", _price_refresh, items_key="fetched", uses_steam=True)
+register_job("language_backfill", "15 * * * *", _language_backfill, items_key="scanned", uses_steam=True)
+register_job("ranking_rebuild", "45 3 * * *", _ranking_rebuild, items_key="matched")
+register_job("review_feed_rebuild", "30 4 * * *", _review_feed_rebuild, items_key="feed")
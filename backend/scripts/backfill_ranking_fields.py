@@ -0,0 +1,21 @@
+import sys
+import os
+import time
+# Ensure backend/ is in sys.path for config import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import db
+from indexes import ensure_indexes
+from ranking import refresh_ranking
+
+games_collection = db.steamGames
+
+
+def main():
+    started = time.time()
+    ensure_indexes()
+    result = refresh_ranking(games_collection)
+    print(f"Recomputed ranking for {result.modified_count} of {result.matched_count} games "
+          f"in {time.time() - started:.1f}s.")
+
+if __name__ == "__main__":
+    main()
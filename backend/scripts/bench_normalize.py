@@ -0,0 +1,150 @@
+"""
+Micro-benchmark: memoized normalize.py parser vs. the legacy per-request
+ensure_array / extract_tags helpers that used to live in utils.py and routes/games.py.
+
+Usage:
+    python scripts/bench_normalize.py                 # synthetic sample shaped like steamGames
+    python scripts/bench_normalize.py --from-db 5000  # sample real metadata from MongoDB
+"""
+import sys
+import os
+import ast
+import random
+import argparse
+import timeit
+# Ensure backend/ is in sys.path for normalize import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from normalize import normalize_list_fields, parse_cache_info
+
+FIELDS = ["developers", "publishers", "genres", "tags", "supported_languages"]
+
+# ------------------------------------------------------------
+# Legacy implementations (verbatim behaviour, kept for comparison)
+# ------------------------------------------------------------
+
+def legacy_ensure_array(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        cleaned = []
+        for item in value:
+            if isinstance(item, str):
+                try:
+                    parsed = ast.literal_eval(item)
+                    if isinstance(parsed, list):
+                        cleaned.extend([str(x) for x in parsed])
+                    else:
+                        cleaned.append(str(parsed))
+                except Exception:
+                    cleaned.append(item.strip("[]'\""))
+            else:
+                cleaned.append(item)
+        return cleaned
+    if isinstance(value, str):
+        try:
+            parsed = ast.literal_eval(value)
+            if isinstance(parsed, list):
+                return [str(x) for x in parsed]
+            return [str(parsed)]
+        except Exception:
+            return [value.strip("[]'\"")]
+    return [value]
+
+def legacy_extract_tags(val):
+    if isinstance(val, dict):
+        return list(val.keys())
+    elif isinstance(val, list):
+        result = []
+        for t in val:
+            if isinstance(t, str):
+                try:
+                    parsed = ast.literal_eval(t)
+                    if isinstance(parsed, dict):
+                        result.extend(list(parsed.keys()))
+                    elif isinstance(parsed, list):
+                        result.extend([str(x) for x in parsed])
+                    else:
+                        result.append(str(parsed))
+                except Exception:
+                    result.append(t)
+            elif isinstance(t, dict):
+                result.extend(list(t.keys()))
+            else:
+                result.append(str(t))
+        return result
+    elif isinstance(val, str):
+        try:
+            return legacy_extract_tags(ast.literal_eval(val))
+        except Exception:
+            return [val]
+    elif val is not None:
+        return [str(val)]
+    return []
+
+def legacy_normalize(metadata):
+    return {
+        "developers": legacy_ensure_array(metadata.get("developers")),
+        "publishers": legacy_ensure_array(metadata.get("publishers")),
+        "genres": legacy_ensure_array(metadata.get("genres")),
+        "tags": legacy_extract_tags(metadata.get("tags")),
+        "supported_languages": legacy_ensure_array(metadata.get("supported_languages")),
+    }
+
+# ------------------------------------------------------------
+# Samples
+# ------------------------------------------------------------
+
+def synthetic_sample(size, seed=661):
+    """Metadata shaped like the raw dataset: stringified lists/dicts with heavy repetition."""
+    rng = random.Random(seed)
+    tag_pool = ["Action", "Indie", "Adventure", "Casual", "RPG", "Strategy", "Simulation",
+                "Singleplayer", "Multiplayer", "Puzzle", "2D", "Pixel Graphics", "Horror", "FPS"]
+    lang_pool = ["English", "French", "German", "Spanish - Spain", "Italian", "Japanese",
+                 "Russian", "Simplified Chinese", "Korean", "Portuguese - Brazil"]
+    studios = [f"Studio {i}" for i in range(400)]
+    # A few hundred distinct blobs shared across the catalog, as in the real data
+    tag_blobs = [str({t: rng.randint(10, 5000) for t in rng.sample(tag_pool, rng.randint(3, 8))}) for _ in range(300)]
+    lang_blobs = [str(rng.sample(lang_pool, rng.randint(1, 8))) for _ in range(120)]
+    genre_blobs = [str(rng.sample(tag_pool[:7], rng.randint(1, 3))) for _ in range(60)]
+
+    sample = []
+    for _ in range(size):
+        studio = rng.choice(studios)
+        sample.append({
+            "developers": [str([studio])] if rng.random() < 0.5 else [studio],
+            "publishers": str([studio]),
+            "genres": rng.choice(genre_blobs),
+            "tags": [rng.choice(tag_blobs)],
+            "supported_languages": rng.choice(lang_blobs),
+        })
+    return sample
+
+def db_sample(size):
+    from config import db
+    projection = {"_id": 0, **{f"metadata.{f}": 1 for f in FIELDS}}
+    return [doc.get("metadata", {}) for doc in db.steamGames.find({}, projection).limit(size)]
+
+# ------------------------------------------------------------
+
+def bench(label, fn, sample, repeat):
+    times = timeit.repeat(lambda: [fn(m) for m in sample], number=1, repeat=repeat)
+    best = min(times)
+    print(f"{label:<28} best {best * 1000:8.1f} ms  ({len(sample) / best:,.0f} docs/s)")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metadata normalization.")
+    parser.add_argument("--size", type=int, default=20000, help="Synthetic sample size")
+    parser.add_argument("--from-db", type=int, metavar="N", help="Use N documents from MongoDB instead")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sample = db_sample(args.from_db) if args.from_db else synthetic_sample(args.size)
+    print(f"Sample: {len(sample)} metadata documents")
+
+    legacy = bench("legacy ensure_array/extract", legacy_normalize, sample, args.repeat)
+    memo = bench("normalize_list_fields", normalize_list_fields, sample, args.repeat)
+    print(f"Speed-up: {legacy / memo:.1f}x   memo: {parse_cache_info()}")
+
+if __name__ == "__main__":
+    main()
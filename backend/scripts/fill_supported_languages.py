@@ -1,43 +1,34 @@
+"""
+Backfill metadata.supported_languages for games that are missing it.
 
+Only games with a missing/empty field are read (appid only), apps Steam has
+no language data for are remembered in steam_negative_cache, and updates are
+written in batches.
+
+Usage:
+    python scripts/fill_supported_languages.py
+    python scripts/fill_supported_languages.py --workers 8 --batch-size 500 --limit 1000
+"""
 import sys
 import os
-import requests
-import time
+import json
+import argparse
 # Ensure backend/ is in sys.path for config import
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from config import db
-
-games_collection = db.steamGames
-STEAM_API_URL = "https://store.steampowered.com/api/appdetails?appids={appid}&l=english"
+from indexes import ensure_indexes
+from enrichment import backfill_supported_languages
 
-def fetch_supported_languages(appid):
-    try:
-        url = STEAM_API_URL.format(appid=appid)
-        resp = requests.get(url, timeout=10)
-        data = resp.json()
-        game_data = data.get(str(appid), {}).get('data', {})
-        languages_str = game_data.get('supported_languages', '')
-        # Split by comma, clean up whitespace and HTML tags
-        langs = [lang.strip() for lang in languages_str.replace('<strong>', '').replace('</strong>', '').split(',') if lang.strip()]
-        return langs
-    except Exception as e:
-        print(f"Error fetching languages for appid {appid}: {e}")
-        return []
 
 def main():
-    games = list(games_collection.find({}))
-    for game in games:
-        appid = game.get('appid')
-        if not appid:
-            continue
-        # Only update if missing or empty
-        meta = game.get('metadata', {})
-        if not meta.get('supported_languages'):
-            langs = fetch_supported_languages(appid)
-            if langs:
-                games_collection.update_one({'appid': appid}, {'$set': {'metadata.supported_languages': langs}})
-                print(f"Updated appid {appid} with languages: {langs}")
-            time.sleep(1)  # Be kind to Steam API
+    parser = argparse.ArgumentParser(description="Fill missing supported_languages from Steam.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Steam lookups")
+    parser.add_argument("--batch-size", type=int, default=200, help="Games per cursor batch / bulk_write")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after N games")
+    args = parser.parse_args()
+
+    ensure_indexes()
+    report = backfill_supported_languages(workers=args.workers, batch_size=args.batch_size, limit=args.limit)
+    print(json.dumps(report, indent=2, default=str))
 
 if __name__ == "__main__":
     main()
@@ -1,22 +1,31 @@
-# Script to add missing _id fields to reviews in all games
-from pymongo import MongoClient
-from bson import ObjectId
+"""
+Add missing _id fields to embedded reviews in all games.
 
-# Adjust connection string as needed
-client = MongoClient('mongodb://localhost:27017/')
-db = client['steam']  # Change to your DB name if different
-games = db.steamGames
+scripts/migrate_reviews_collection.py runs the same repair before copying;
+use this to check (--dry-run) or fix ids on its own before migrating.
 
-count = 0
-for game in games.find({"reviews.list": {"$exists": True, "$ne": []}}):
-    reviews = game['reviews']['list']
-    updated = False
-    for review in reviews:
-        if ('_id' not in review) or (not review['_id']) or (str(review['_id']).strip() in ('', 'None', 'null')):
-            review['_id'] = ObjectId()
-            updated = True
-            count += 1
-    if updated:
-        games.update_one({'_id': game['_id']}, {'$set': {'reviews.list': reviews}})
+Usage:
+    python scripts/fix_missing_review_ids.py --dry-run   # count only
+    python scripts/fix_missing_review_ids.py --batch-size 1000
+"""
+import sys
+import os
+import json
+import argparse
+# Ensure backend/ is in sys.path for config import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from review_ids import repair_review_ids
 
-print(f"Added _id to {count} reviews.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Give every embedded review an _id.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Updates per bulk_write")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    report = repair_review_ids(batch_size=args.batch_size, dry_run=args.dry_run)
+    print(json.dumps(report, indent=2, default=str))
+    print(f"Added _id to {report['stats']['repaired']} reviews.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+One-time migration: rewrite every steamGames document into the canonical
+typed shape defined in normalize.py.
+
+Usage:
+    python scripts/migrate_canonical_schema.py --dry-run     # report only
+    python scripts/migrate_canonical_schema.py               # migrate (resumes from checkpoint)
+    python scripts/migrate_canonical_schema.py --restart     # ignore checkpoint, start from scratch
+"""
+import sys
+import os
+import json
+import time
+import argparse
+from collections import Counter
+from datetime import datetime
+from pymongo import UpdateOne
+# Ensure backend/ is in sys.path for config import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import db
+from normalize import SCHEMA_VERSION, LIST_FIELDS, MEDIA_FIELDS, canonical_updates
+
+games_collection = db.steamGames
+migrations_col = db.migrations
+MIGRATION_ID = f"canonical_schema_v{SCHEMA_VERSION}"
+
+PROJECTION = {
+    "_id": 1,
+    "appid": 1,
+    "schema_version": 1,
+    **{f"metadata.{field}": 1 for field in LIST_FIELDS},
+    **{f"media.{field}": 1 for field in MEDIA_FIELDS},
+}
+
+
+def load_checkpoint():
+    return migrations_col.find_one({"_id": MIGRATION_ID}) or {}
+
+
+def save_checkpoint(last_id, stats, done=False):
+    migrations_col.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {
+            "last_id": last_id,
+            "stats": dict(stats),
+            "done": done,
+            "updated_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+
+def migrate(dry_run=False, batch_size=500, restart=False):
+    checkpoint = {} if (restart or dry_run) else load_checkpoint()
+    if checkpoint.get("done"):
+        print(f"{MIGRATION_ID} already completed ({checkpoint.get('stats')}). Use --restart to run again.")
+        return
+
+    stats = Counter(checkpoint.get("stats", {}))
+    samples = []
+    query = {"schema_version": {"$ne": SCHEMA_VERSION}}
+    if checkpoint.get("last_id") is not None:
+        query["_id"] = {"$gt": checkpoint["last_id"]}
+        print(f"Resuming {MIGRATION_ID} after _id {checkpoint['last_id']}")
+
+    cursor = games_collection.find(query, PROJECTION).sort("_id", 1).batch_size(batch_size)
+    started = time.time()
+    ops = []
+    last_id = checkpoint.get("last_id")
+
+    def flush():
+        if ops and not dry_run:
+            result = games_collection.bulk_write(ops, ordered=False)
+            stats["modified"] += result.modified_count
+        if not dry_run:
+            save_checkpoint(last_id, stats)
+        ops.clear()
+
+    for doc in cursor:
+        stats["scanned"] += 1
+        updates = canonical_updates(doc)
+        for key in updates:
+            if key != "schema_version":
+                stats[f"field:{key}"] += 1
+        if len(updates) > 1:
+            stats["reshaped"] += 1
+            if len(samples) < 5:
+                samples.append({"appid": doc.get("appid"), "fields": sorted(k for k in updates if k != "schema_version")})
+
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": updates}))
+        last_id = doc["_id"]
+
+        if len(ops) >= batch_size:
+            flush()
+            elapsed = time.time() - started
+            print(f"  {stats['scanned']} scanned, {stats['reshaped']} reshaped ({stats['scanned'] / max(elapsed, 1e-6):.0f} docs/s)")
+
+    flush()
+    if not dry_run:
+        save_checkpoint(last_id, stats, done=True)
+
+    report = {
+        "migration": MIGRATION_ID,
+        "dry_run": dry_run,
+        "elapsed_seconds": round(time.time() - started, 1),
+        "stats": dict(stats),
+        "samples": samples,
+    }
+    print(json.dumps(report, indent=2, default=str))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite steamGames into the canonical schema.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per bulk_write batch")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run, batch_size=args.batch_size, restart=args.restart)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+One-time migration: move embedded steamGames.reviews.list entries into the
+reviews collection (see review_store.py).
+
+Each review keeps its _id (24-hex string ids become ObjectIds) and gains the
+game's appid. Copies are upserts keyed on _id, so re-running is safe. Once a
+game's reviews are copied its embedded list is removed, unless --keep-embedded.
+
+Usage:
+    python scripts/migrate_reviews_collection.py --dry-run     # report only
+    python scripts/migrate_reviews_collection.py               # migrate (resumes from checkpoint)
+    python scripts/migrate_reviews_collection.py --restart     # ignore checkpoint, start from scratch
+"""
+import sys
+import os
+import json
+import time
+import argparse
+from collections import Counter
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+# Ensure backend/ is in sys.path for config import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import db
+from indexes import ensure_indexes
+from review_ids import repair_review_ids
+from review_feed import rebuild_review_feed
+from review_store import reviews_collection
+
+games_collection = db.steamGames
+migrations_col = db.migrations
+MIGRATION_ID = "reviews_collection_v1"
+
+
+def load_checkpoint():
+    return migrations_col.find_one({"_id": MIGRATION_ID}) or {}
+
+
+def save_checkpoint(last_id, stats, done=False):
+    migrations_col.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {
+            "last_id": last_id,
+            "stats": dict(stats),
+            "done": done,
+            "updated_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+
+def to_review_doc(review, appid):
+    review_id = review.get("_id")
+    if isinstance(review_id, str) and ObjectId.is_valid(review_id):
+        review_id = ObjectId(review_id)
+    return {**review, "_id": review_id, "appid": appid}
+
+
+def migrate(dry_run=False, batch_size=500, restart=False, keep_embedded=False):
+    checkpoint = {} if (restart or dry_run) else load_checkpoint()
+    if checkpoint.get("done"):
+        print(f"{MIGRATION_ID} already completed ({checkpoint.get('stats')}). Use --restart to run again, "
+              f"or scripts/run_scheduler.py --run review_feed_rebuild to re-seed the recent-reviews feed.")
+        return
+
+    if not dry_run:
+        ensure_indexes()
+        # Every embedded review needs an _id before it can be keyed on it
+        repaired = repair_review_ids()["stats"]["repaired"]
+        if repaired:
+            print(f"Assigned _id to {repaired} embedded reviews")
+
+    stats = Counter(checkpoint.get("stats", {}))
+    query = {"reviews.list": {"$exists": True}}
+    if checkpoint.get("last_id") is not None:
+        query["_id"] = {"$gt": checkpoint["last_id"]}
+        print(f"Resuming {MIGRATION_ID} after _id {checkpoint['last_id']}")
+
+    cursor = games_collection.find(query, {"appid": 1, "reviews.list": 1}).sort("_id", 1).batch_size(batch_size)
+    started = time.time()
+    review_ops, game_ops = [], []
+    last_id = checkpoint.get("last_id")
+
+    def flush():
+        if not dry_run:
+            # Copy first, then drop the embedded lists: a crash in between only repeats idempotent upserts
+            if review_ops:
+                result = reviews_collection.bulk_write(review_ops, ordered=False)
+                stats["inserted"] += result.upserted_count
+            if game_ops:
+                games_collection.bulk_write(game_ops, ordered=False)
+            save_checkpoint(last_id, stats)
+        review_ops.clear()
+        game_ops.clear()
+
+    for game in cursor:
+        stats["games"] += 1
+        reviews_list = (game.get("reviews") or {}).get("list") or []
+        for review in reviews_list:
+            if not isinstance(review, dict) or not review.get("_id"):
+                stats["skipped_invalid"] += 1
+                continue
+            doc = to_review_doc(review, game.get("appid"))
+            review_ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+            stats["reviews"] += 1
+        if not keep_embedded:
+            game_ops.append(UpdateOne({"_id": game["_id"]}, {"$unset": {"reviews.list": ""}}))
+        last_id = game["_id"]
+
+        if len(review_ops) >= batch_size:
+            flush()
+            elapsed = time.time() - started
+            print(f"  {stats['games']} games, {stats['reviews']} reviews ({stats['reviews'] / max(elapsed, 1e-6):.0f} reviews/s)")
+
+    flush()
+    if not dry_run:
+        # Seed the recent-reviews feed and last-hour buckets from the migrated reviews
+        stats.update(rebuild_review_feed()["stats"])
+        save_checkpoint(last_id, stats, done=True)
+
+    report = {
+        "migration": MIGRATION_ID,
+        "dry_run": dry_run,
+        "kept_embedded": keep_embedded,
+        "elapsed_seconds": round(time.time() - started, 1),
+        "stats": dict(stats),
+    }
+    print(json.dumps(report, indent=2, default=str))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move embedded reviews into the reviews collection.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would move without writing")
+    parser.add_argument("--batch-size", type=int, default=500, help="Reviews per bulk_write batch")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    parser.add_argument("--keep-embedded", action="store_true", help="Copy reviews but leave reviews.list in place")
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run, batch_size=args.batch_size, restart=args.restart, keep_embedded=args.keep_embedded)
+
+if __name__ == "__main__":
+    main()
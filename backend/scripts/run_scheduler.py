@@ -0,0 +1,40 @@
+"""
+Run the catalog maintenance jobs registered in scheduler.py on their cron schedules.
+
+Usage:
+    python scripts/run_scheduler.py                         # run all jobs forever
+    python scripts/run_scheduler.py --only price_refresh    # run a subset forever
+    python scripts/run_scheduler.py --run ranking_rebuild   # run one job now and exit
+    python scripts/run_scheduler.py --list                  # show jobs and recent runs
+"""
+import sys
+import os
+import json
+import argparse
+# Ensure backend/ is in sys.path for config import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from indexes import ensure_indexes
+from scheduler import JOBS, recent_runs, run_forever, run_job
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Periodic catalog maintenance scheduler.")
+    parser.add_argument("--only", nargs="+", choices=sorted(JOBS), help="Schedule only these jobs")
+    parser.add_argument("--run", choices=sorted(JOBS), help="Run a single job immediately and exit")
+    parser.add_argument("--list", action="store_true", help="List jobs with their last runs and exit")
+    args = parser.parse_args()
+
+    ensure_indexes()
+    if args.list:
+        for name, job in sorted(JOBS.items()):
+            last = recent_runs(name, limit=1)
+            print(f"{name:20} {job.schedule.expression:15} last: {json.dumps(last[0] if last else None, default=str)}")
+        return
+    if args.run:
+        run = run_job(JOBS[args.run])
+        print(json.dumps(run, indent=2, default=str))
+        return
+    run_forever([JOBS[name] for name in args.only] if args.only else None)
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,46 @@
-import requests
-from pymongo import MongoClient
-from time import sleep
+"""
+Refresh GBP prices for the whole catalog into steam_prices and metadata.price.
 
-# --- CONFIG ---
-MONGO_URI = 'mongodb://localhost:27017/'
-DB_NAME = 'steam'
-COLLECTION = 'steamGames'
+Popular games go first, prices fetched within --max-age-hours are skipped,
+and progress is checkpointed in db.job_checkpoints so an interrupted run
+resumes where it stopped.
 
-# --- STEAM API ---
-STEAM_API_URL = 'https://store.steampowered.com/api/appdetails?appids={appid}&cc=gb&l=en'
+Usage:
+    python scripts/update_gbp_prices.py                  # refresh (resumes from checkpoint)
+    python scripts/update_gbp_prices.py --restart        # ignore checkpoint, start from the top
+    python scripts/update_gbp_prices.py --workers 8 --max-age-hours 24
+"""
+import sys
+import os
+import json
+import argparse
+from datetime import timedelta
+# Ensure backend/ is in sys.path for config/prices imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import STEAM_PRICE_BATCH_SIZE
+from indexes import ensure_indexes
+from prices import PRICE_STALE_AFTER, refresh_catalog_prices
 
-# --- SCRIPT ---
-def fetch_gbp_price(appid):
-    try:
-        url = STEAM_API_URL.format(appid=appid)
-        resp = requests.get(url, timeout=5)
-        data = resp.json()
-        entry = data.get(str(appid), None)
-        if not entry or not entry.get('success'):
-            print(f"[Missing] appid {appid}: No data from Steam API.")
-            return None
-        price_info = entry['data'].get('price_overview')
-        if price_info and price_info.get('currency') == 'GBP':
-            return price_info['final'] / 100.0
-        elif price_info and price_info.get('final'):
-            return price_info['final'] / 100.0
-        else:
-            print(f"[Missing] appid {appid}: No price info available.")
-    except Exception as e:
-        print(f"[Error] appid {appid}: {e}")
-    return None
 
-def update_all_prices():
-    client = MongoClient(MONGO_URI)
-    db = client[DB_NAME]
-    games = db[COLLECTION]
-    
-    all_games = list(games.find({}, {'appid': 1}))
-    print(f"Found {len(all_games)} games.")
-    updated = 0
-    for g in all_games:
-        appid = g.get('appid')
-        if not appid:
-            continue
-        price = fetch_gbp_price(appid)
-        if price is not None:
-            result = games.update_one({'appid': appid}, {'$set': {'metadata.price': price}})
-            if result.modified_count:
-                print(f"Updated appid {appid} to £{price}")
-                updated += 1
-        sleep(0.5)  # avoid hammering Steam API
-    print(f"Done. Updated {updated} games.")
+def main():
+    parser = argparse.ArgumentParser(description="Refresh Steam GBP prices for every game.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent multi-appid fetches")
+    parser.add_argument("--batch-size", type=int, default=STEAM_PRICE_BATCH_SIZE, help="Appids per Steam request")
+    parser.add_argument("--max-age-hours", type=float, default=PRICE_STALE_AFTER.total_seconds() / 3600,
+                        help="Skip prices fetched more recently than this")
+    parser.add_argument("--limit", type=int, default=None, help="Only consider the N most popular games")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    args = parser.parse_args()
+
+    ensure_indexes()
+    report = refresh_catalog_prices(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        max_age=timedelta(hours=args.max_age_hours),
+        restart=args.restart,
+        limit=args.limit,
+    )
+    print(json.dumps(report, indent=2, default=str))
 
 if __name__ == '__main__':
-    update_all_prices()
+    main()
@@ -0,0 +1,69 @@
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from bson import ObjectId, Decimal128
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; stdlib json is used otherwise
+    orjson = None
+
+# ============================================================
+# BSON -> JSON-SAFE PYTHON (clean_doc / clean_docs)
+# ============================================================
+#
+# Same output shape as json.loads(json_util.dumps(doc)) with pymongo's
+# relaxed extended JSON, built in a single in-memory walk instead of a
+# serialize/parse round trip.
+
+def _extended_date(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    fraction = f".{value.microsecond // 1000:03d}" if value.microsecond else ""
+    return {"$date": f"{value.strftime('%Y-%m-%dT%H:%M:%S')}{fraction}Z"}
+
+
+def to_extended_json(value):
+    """Recursively convert BSON types to their relaxed extended-JSON dict form."""
+    if isinstance(value, dict):
+        return {k: to_extended_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_extended_json(v) for v in value]
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return _extended_date(value)
+    if isinstance(value, Decimal128):
+        return {"$numberDecimal": str(value)}
+    return value
+
+
+# ============================================================
+# RESPONSE ENCODING (api_response)
+# ============================================================
+
+def _default(value):
+    """Encode types the JSON encoders don't know, matching Flask's jsonify where it has an opinion."""
+    if isinstance(value, (datetime, date)):
+        return http_date(value)
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(body):
+        """Serialize a response body straight to UTF-8 bytes."""
+        return orjson.dumps(body, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(body):
+        """Serialize a response body straight to UTF-8 bytes."""
+        return json.dumps(body, default=_default, sort_keys=True, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,441 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# ============================================================
+# STEAM PROXY CACHE BACKENDS
+# ============================================================
+#
+# Every backend stores entries as (expires_at, payload) and exposes the same
+# small interface used by routes/steam_proxy.py:
+#
+#     get(key)                        -> (expires_at, payload) or None
+#     set(key, payload, expires_at)
+#     delete(key)
+#     stats()                         -> dict
+#
+# Entries are dropped once they are `stale_retention` seconds past expiry;
+# callers decide whether an entry that is still retained counts as fresh.
+# Size limits are byte budgets measured on the JSON-encoded payload
+# (zlib-compressed for the on-disk SQLite tier).
+
+COMPRESS_LEVEL = 6
+
+
+def _encode(payload):
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _compress(data):
+    return zlib.compress(data, COMPRESS_LEVEL)
+
+
+def _decompress(blob):
+    # Rows written before compression was added hold plain JSON ('{', '[', ...);
+    # zlib streams always start with 0x78.
+    blob = bytes(blob)
+    return zlib.decompress(blob) if blob[:1] == b"\x78" else blob
+
+
+class MemoryCache:
+    """In-process LRU cache bounded by an approximate byte budget. Thread-safe."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, stale_retention=0):
+        self.max_bytes = max_bytes
+        self.stale_retention = stale_retention
+        self._entries = OrderedDict()  # key -> (expires_at, payload, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[0] + self.stale_retention <= time.time():
+                self._remove(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0], entry[1]
+
+    def set(self, key, payload, expires_at, size=None):
+        size = size if size is not None else len(_encode(payload))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (expires_at, payload, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+class SQLiteCache:
+    """
+    File-backed, compressed LRU cache shared by every worker process on the host.
+    Survives restarts; per-key hit counts drive the startup warm-load (hottest()).
+    Uses WAL mode so readers don't block the writer; one connection per thread.
+    Reads are recorded in memory and written back in batches, and the size
+    budget is enforced every EVICT_EVERY writes, so the table may overshoot
+    max_bytes by that many entries between passes.
+    """
+
+    EVICT_EVERY = 50      # writes between eviction passes
+    TOUCH_BATCH = 100     # pending read records before accessed_at/hits are written
+    TOUCH_INTERVAL = 5    # ...or seconds since the last write-back
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, stale_retention=0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stale_retention = stale_retention
+        self._local = threading.local()
+        self._touches = {}  # key -> (accessed_at, hits since last write-back)
+        self._last_touch_flush = time.time()
+        self._writes_since_evict = 0
+        self._counter_lock = threading.Lock()
+        atexit.register(self.flush_touches)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS steam_cache ("
+            " key TEXT PRIMARY KEY, expires_at REAL NOT NULL, size INTEGER NOT NULL,"
+            " accessed_at REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS steam_cache_accessed ON steam_cache (accessed_at)")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(steam_cache)")}
+        if "hits" not in columns:
+            conn.execute("ALTER TABLE steam_cache ADD COLUMN hits INTEGER NOT NULL DEFAULT 0")
+        if "created_at" not in columns:
+            conn.execute("ALTER TABLE steam_cache ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT expires_at, payload FROM steam_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] + self.stale_retention <= now:
+                conn.execute("DELETE FROM steam_cache WHERE key = ?", (key,))
+                return None
+            self._touch(key, now)
+            return row[0], json.loads(_decompress(row[1]))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            print(f"[CACHE ERROR] sqlite get {key}: {e}")
+            return None
+
+    def _touch(self, key, now):
+        with self._counter_lock:
+            hits = self._touches.get(key, (0, 0))[1]
+            self._touches[key] = (now, hits + 1)
+            due = len(self._touches) >= self.TOUCH_BATCH or now - self._last_touch_flush >= self.TOUCH_INTERVAL
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self):
+        """Write pending accessed_at/hits updates in one transaction."""
+        with self._counter_lock:
+            touches, self._touches = self._touches, {}
+            self._last_touch_flush = time.time()
+        if not touches:
+            return
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "UPDATE steam_cache SET accessed_at = MAX(accessed_at, ?), hits = hits + ? WHERE key = ?",
+                [(accessed_at, hits, key) for key, (accessed_at, hits) in touches.items()]
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"[CACHE ERROR] sqlite access write-back ({len(touches)} keys): {e}")
+
+    def set(self, key, payload, expires_at, size=None):
+        data = _compress(_encode(payload))
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._conn()
+            # Keep the hit count across refreshes so hot keys stay hot
+            conn.execute(
+                "INSERT INTO steam_cache (key, expires_at, size, accessed_at, payload, hits, created_at)"
+                " VALUES (?, ?, ?, ?, ?, 0, ?)"
+                " ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at, size = excluded.size,"
+                " accessed_at = excluded.accessed_at, payload = excluded.payload, created_at = excluded.created_at",
+                (key, expires_at, len(data), now, data, now)
+            )
+            with self._counter_lock:
+                self._writes_since_evict += 1
+                due = self._writes_since_evict >= self.EVICT_EVERY
+                if due:
+                    self._writes_since_evict = 0
+            if due:
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"[CACHE ERROR] sqlite set {key}: {e}")
+
+    def _evict(self, conn):
+        self.flush_touches()  # LRU order should reflect recent reads
+        conn.execute("DELETE FROM steam_cache WHERE expires_at + ? <= ?", (self.stale_retention, time.time()))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM steam_cache").fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM steam_cache ORDER BY accessed_at LIMIT 50").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM steam_cache WHERE key = ?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def delete(self, key):
+        try:
+            self._conn().execute("DELETE FROM steam_cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print(f"[CACHE ERROR] sqlite delete {key}: {e}")
+
+    def hottest(self, limit):
+        """Yield (key, expires_at, payload) for the most-hit entries still within retention."""
+        self.flush_touches()
+        try:
+            rows = self._conn().execute(
+                "SELECT key, expires_at, payload FROM steam_cache WHERE expires_at + ? > ?"
+                " ORDER BY hits DESC, accessed_at DESC LIMIT ?",
+                (self.stale_retention, time.time(), limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"[CACHE ERROR] sqlite warm-load: {e}")
+            return
+        for key, expires_at, blob in rows:
+            try:
+                yield key, expires_at, json.loads(_decompress(blob))
+            except (zlib.error, ValueError):
+                continue
+
+    def stats(self):
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM steam_cache"
+        ).fetchone()
+        return {"backend": "sqlite", "path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class TieredCache:
+    """
+    In-process tier in front of a shared tier; shared hits are promoted locally.
+    Writes land in the local tier immediately and reach the shared (on-disk) tier
+    via a background writer, so request threads never wait on SQLite; writes
+    still queued at interpreter exit are drained by an atexit handler.
+    """
+
+    WRITE_QUEUE_SIZE = 1000
+
+    def __init__(self, local, shared, write_behind=True):
+        self.local = local
+        self.shared = shared
+        self._writes = None
+        if write_behind:
+            self._writes = queue.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+            threading.Thread(target=self._write_loop, name="steam-cache-writer", daemon=True).start()
+            atexit.register(self._drain)
+
+    def _write_loop(self):
+        while True:
+            key, payload, expires_at = self._writes.get()
+            try:
+                self.shared.set(key, payload, expires_at)
+            finally:
+                self._writes.task_done()
+
+    def _drain(self):
+        """Write whatever is still queued on this thread, then wait for the writer's in-flight write."""
+        while True:
+            try:
+                key, payload, expires_at = self._writes.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self.shared.set(key, payload, expires_at)
+            finally:
+                self._writes.task_done()
+        self._writes.join()
+
+    def flush(self):
+        """Block until queued shared-tier writes are on disk (scripts, shutdown)."""
+        if self._writes is not None:
+            self._writes.join()
+
+    def warm(self, limit):
+        """Load the hottest shared-tier entries into the local tier. Returns the number loaded."""
+        loaded = 0
+        for key, expires_at, payload in self.shared.hottest(limit):
+            self.local.set(key, payload, expires_at)
+            loaded += 1
+        return loaded
+
+    def get(self, key):
+        entry = self.local.get(key)
+        if entry is not None and entry[0] > time.time():
+            return entry
+        # Local copy missing or stale: another process may have refreshed the shared tier
+        shared = self.shared.get(key)
+        if shared is not None and (entry is None or shared[0] > entry[0]):
+            self.local.set(key, shared[1], shared[0])
+            return shared
+        return entry
+
+    def set(self, key, payload, expires_at):
+        size = len(_encode(payload))
+        self.local.set(key, payload, expires_at, size=size)
+        if self._writes is None:
+            self.shared.set(key, payload, expires_at)
+            return
+        try:
+            self._writes.put_nowait((key, payload, expires_at))
+        except queue.Full:
+            self.shared.set(key, payload, expires_at)  # writer is behind: write through
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def stats(self):
+        return {
+            "backend": "tiered",
+            "local": self.local.stats(),
+            "shared": self.shared.stats(),
+            "pending_writes": self._writes.qsize() if self._writes is not None else 0,
+        }
+
+
+# ============================================================
+# SINGLE-FLIGHT REQUEST COALESCING
+# ============================================================
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution (per process).
+    The first caller runs `fn`; callers arriving while it is in flight wait for
+    and share its result instead of issuing their own upstream request.
+    """
+
+    def __init__(self, wait_timeout=30):
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Return (result, shared): shared is True when another caller did the work."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(self.wait_timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result, True
+            # The leader is stuck; don't hold this caller hostage
+            return fn(), False
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "steam_proxy_cache.sqlite3")
+
+
+def build_cache(backend="tiered", memory_bytes=32 * 1024 * 1024, shared_bytes=256 * 1024 * 1024,
+                path=DEFAULT_SQLITE_PATH, stale_retention=0, warm_keys=0):
+    """
+    Create the configured cache backend ('memory', 'sqlite' or 'tiered').
+    For 'tiered', the `warm_keys` hottest on-disk entries are loaded into memory
+    in the background so a restart doesn't start from a cold cache.
+    """
+    if backend == "memory":
+        return MemoryCache(memory_bytes, stale_retention)
+    try:
+        shared = SQLiteCache(path, shared_bytes, stale_retention)
+    except (sqlite3.Error, OSError) as e:
+        print(f"[CACHE ERROR] shared cache unavailable ({e}); using in-process cache only")
+        return MemoryCache(memory_bytes, stale_retention)
+    if backend == "sqlite":
+        return shared
+    cache = TieredCache(MemoryCache(memory_bytes, stale_retention), shared)
+    if warm_keys > 0:
+        threading.Thread(target=_warm, args=(cache, warm_keys), name="steam-cache-warm", daemon=True).start()
+    return cache
+
+
+def _warm(cache, limit):
+    started = time.time()
+    loaded = cache.warm(limit)
+    print(f"[CACHE] warm-loaded {loaded} Steam entries in {time.time() - started:.2f}s")
@@ -0,0 +1,375 @@
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    STEAM_RATE_PER_SEC, STEAM_RATE_BURST, STEAM_PRICE_BATCH_SIZE,
+    STEAM_HTTP_POOL_SIZE, STEAM_HTTP_RETRIES, STEAM_HTTP_BACKOFF,
+    STEAM_BREAKER_THRESHOLD, STEAM_BREAKER_COOLDOWN,
+    STEAM_CACHE_BACKEND, STEAM_CACHE_MEMORY_MB, STEAM_CACHE_SHARED_MB, STEAM_CACHE_PATH,
+    STEAM_CACHE_STALE_GRACE, STEAM_CACHE_WARM_KEYS
+)
+from steam_cache import build_cache
+
+# ============================================================
+# STEAM RATE LIMITING
+# ============================================================
+#
+# Every outbound Steam call in this process (proxy, enrichment worker,
+# price lookups, scripts) draws from the same token bucket so bursts from
+# one caller can't exhaust the upstream rate limit for the others.
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity` banked."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Block until a token is available. Returns False if `timeout` seconds pass first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+steam_rate_limiter = TokenBucket(STEAM_RATE_PER_SEC, STEAM_RATE_BURST)
+
+
+
+# ============================================================
+# POOLED HTTP CLIENT
+# ============================================================
+#
+# steam_get() is the only way backend code talks to Steam:
+#   - one keep-alive Session, at most STEAM_HTTP_POOL_SIZE connections per host
+#   - a rate-limiter token per attempt
+#   - jittered exponential backoff on 429/5xx and network errors
+#     (Retry-After is honoured when Steam sends it)
+#   - a per-host circuit breaker that fails fast while Steam is unhealthy
+# Errors are raised as requests.RequestException subclasses, so existing
+# `except requests.RequestException` handlers keep working.
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_BACKOFF = 8
+
+
+class SteamUnavailable(requests.RequestException):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+class SteamRateLimited(requests.RequestException):
+    """Raised when no rate-limiter token became available in time."""
+
+
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failures -> half_open after `cooldown` -> closed on success."""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if now - self._opened_at >= self.cooldown else "open"
+
+    def rejecting(self):
+        """Read-only check: True while allow() would refuse (open, or half-open with the probe out)."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            return state == "open" or (state == "half_open" and self._probing)
+
+    def allow(self):
+        """True if a request may go out. Only one probe is let through while half-open."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_in": round(max(self.cooldown - (now - self._opened_at), 0), 1) if state == "open" else 0,
+            }
+
+
+class _HostMetrics:
+    __slots__ = ("requests", "attempts", "retries", "failures", "short_circuited", "latencies", "_lock")
+
+    def __init__(self):
+        self.requests = self.attempts = self.retries = self.failures = self.short_circuited = 0
+        self.latencies = deque(maxlen=512)  # seconds, most recent attempts
+        self._lock = threading.Lock()
+
+    def incr(self, *counters):
+        """Bump counters; steam_get runs on request and pool threads concurrently."""
+        with self._lock:
+            for counter in counters:
+                setattr(self, counter, getattr(self, counter) + 1)
+
+    def observe(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "latencies": sorted(self.latencies),
+            }
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=STEAM_HTTP_POOL_SIZE, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        "Accept": "application/json",
+    })
+    return session
+
+
+_session = _build_session()
+_breakers = {}
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _host_state(host):
+    with _metrics_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(STEAM_BREAKER_THRESHOLD, STEAM_BREAKER_COOLDOWN)
+            _metrics[host] = _HostMetrics()
+        return _breakers[host], _metrics[host]
+
+
+def _backoff(attempt, response=None):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), MAX_BACKOFF)
+    return random.uniform(0, min(STEAM_HTTP_BACKOFF * 2 ** attempt, MAX_BACKOFF))
+
+
+def steam_get(url, params=None, headers=None, timeout=5, retries=STEAM_HTTP_RETRIES, rate_timeout=None):
+    """
+    GET a Steam URL through the shared session. Returns the final Response
+    (which may still be a 429/5xx once retries are exhausted).
+    rate_timeout bounds the wait for a rate-limiter token (None = wait as long as needed).
+    """
+    host = urlsplit(url).netloc
+    breaker, metrics = _host_state(host)
+    metrics.incr("requests")
+
+    for attempt in range(retries + 1):
+        # Fail fast without touching the rate limiter while the breaker refuses
+        if breaker.rejecting():
+            metrics.incr("short_circuited")
+            raise SteamUnavailable(f"circuit open for {host}")
+        # Token before allow(): once allow() hands out a half-open probe, every
+        # path below must report back to the breaker or the probe is never released
+        if not steam_rate_limiter.acquire(timeout=rate_timeout):
+            raise SteamRateLimited(f"no rate-limit token for {host}")
+        if not breaker.allow():
+            metrics.incr("short_circuited")
+            raise SteamUnavailable(f"circuit open for {host}")
+
+        metrics.incr("attempts")
+        started = time.monotonic()
+        try:
+            response = _session.get(url, params=params, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            metrics.observe(time.monotonic() - started)
+            metrics.incr("failures")
+            breaker.record_failure()
+            # Only network errors are worth retrying (not e.g. InvalidURL, TooManyRedirects)
+            if attempt == retries or not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                raise
+            metrics.incr("retries")
+            time.sleep(_backoff(attempt))
+            continue
+
+        metrics.observe(time.monotonic() - started)
+        if response.status_code not in RETRY_STATUSES:
+            breaker.record_success()
+            return response
+        metrics.incr("failures")
+        breaker.record_failure()
+        if attempt == retries:
+            return response
+        metrics.incr("retries")
+        time.sleep(_backoff(attempt, response))
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(int(len(sorted_values) * pct), len(sorted_values) - 1)
+    return round(sorted_values[index] * 1000, 1)
+
+
+def steam_client_stats():
+    """Per-host request counters, breaker state and recent latency (ms) for the Steam client."""
+    with _metrics_lock:
+        hosts = list(_metrics.items())
+    report = {}
+    for host, metrics in hosts:
+        counters = metrics.snapshot()
+        latencies = counters.pop("latencies")
+        report[host] = {
+            **counters,
+            "breaker": _breakers[host].stats(),
+            "latency_ms": {
+                "p50": _percentile(latencies, 0.5),
+                "p95": _percentile(latencies, 0.95),
+                "max": _percentile(latencies, 1.0),
+                "samples": len(latencies),
+            },
+        }
+    return {"hosts": report, "rate_limiter_tokens": round(steam_rate_limiter.available(), 2)}
+
+# ============================================================
+# SHARED STEAM RESPONSE CACHE
+# ============================================================
+#
+# One size-bounded cache per process (backed by the shared tier, see
+# steam_cache.py) for the proxy routes and the price client below.
+
+steam_response_cache = build_cache(
+    STEAM_CACHE_BACKEND,
+    memory_bytes=STEAM_CACHE_MEMORY_MB * 1024 * 1024,
+    shared_bytes=STEAM_CACHE_SHARED_MB * 1024 * 1024,
+    stale_retention=STEAM_CACHE_STALE_GRACE,
+    warm_keys=STEAM_CACHE_WARM_KEYS,
+    **({"path": STEAM_CACHE_PATH} if STEAM_CACHE_PATH else {})
+)
+
+
+# ============================================================
+# BATCHED PRICE LOOKUPS
+# ============================================================
+#
+# appdetails accepts a comma-separated appid list when filters=price_overview,
+# so a page of games costs one upstream call instead of one per game.
+# Results are cached per appid, so later single lookups hit the cache.
+
+STEAM_APPDETAILS_URL = "https://store.steampowered.com/api/appdetails"
+PRICE_CACHE_TTL = 60 * 60
+
+
+def price_cache_key(appid, cc="gb"):
+    return f"price_{cc}_{appid}"
+
+
+def _fetch_price_chunk(appids, cc, timeout):
+    """One upstream call for up to STEAM_PRICE_BATCH_SIZE appids. Returns {appid: price_overview or None}."""
+    try:
+        resp = steam_get(
+            STEAM_APPDETAILS_URL,
+            params={"appids": ",".join(str(a) for a in appids), "cc": cc, "filters": "price_overview"},
+            timeout=timeout, rate_timeout=timeout
+        )
+        if resp.status_code != 200:
+            return {}
+        data = resp.json() or {}
+    except (requests.RequestException, ValueError) as e:
+        print(f"[STEAM ERROR] price batch ({len(appids)} appids): {e}")
+        return {}
+
+    prices = {}
+    for appid in appids:
+        entry = data.get(str(appid))
+        if not isinstance(entry, dict):
+            continue  # missing from the response: don't cache, retry next time
+        details = entry.get("data") if entry.get("success") else None
+        # Free and delisted apps come back with data == [] or success == false
+        prices[appid] = details.get("price_overview") if isinstance(details, dict) else None
+    return prices
+
+
+def fetch_price_overviews(appids, cc="gb", timeout=5):
+    """
+    Return {appid: price_overview dict or None} for every appid that could be resolved.
+    Cached appids are answered locally; the rest are fetched in multi-appid batches.
+    """
+    now = time.time()
+    results = {}
+    missing = []
+    for appid in dict.fromkeys(appids):
+        cached = steam_response_cache.get(price_cache_key(appid, cc))
+        if cached and cached[0] > now:
+            results[appid] = cached[1]
+        else:
+            missing.append(appid)
+
+    for start in range(0, len(missing), STEAM_PRICE_BATCH_SIZE):
+        chunk = missing[start:start + STEAM_PRICE_BATCH_SIZE]
+        fetched = _fetch_price_chunk(chunk, cc, timeout)
+        expires_at = time.time() + PRICE_CACHE_TTL
+        for appid, price_overview in fetched.items():
+            steam_response_cache.set(price_cache_key(appid, cc), price_overview, expires_at)
+        results.update(fetched)
+    return results
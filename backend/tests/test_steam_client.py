@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("pymongo")
+
+import steam_client
+from steam_client import CircuitBreaker, SteamUnavailable, steam_get
+
+
+@pytest.fixture
+def open_breaker(monkeypatch):
+    """Force the breaker for the test host open and fail the test if the rate limiter is touched."""
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_failure()
+    monkeypatch.setitem(steam_client._breakers, "steam.test", breaker)
+    monkeypatch.setitem(steam_client._metrics, "steam.test", steam_client._HostMetrics())
+    monkeypatch.setattr(
+        steam_client.steam_rate_limiter, "acquire",
+        lambda timeout=None: pytest.fail("open breaker must not wait for a rate-limit token")
+    )
+    monkeypatch.setattr(steam_client._session, "get", lambda *a, **k: pytest.fail("open breaker must not send"))
+    return breaker
+
+
+def test_open_breaker_fails_fast_without_a_token(open_breaker):
+    with pytest.raises(SteamUnavailable):
+        steam_get("https://steam.test/api", rate_timeout=None)
+
+    assert open_breaker.state() == "open"
+    assert steam_client._metrics["steam.test"].snapshot()["short_circuited"] == 1
+
+
+def test_half_open_probe_is_released_when_no_token(monkeypatch):
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure()  # cooldown 0: immediately half-open
+    monkeypatch.setitem(steam_client._breakers, "steam.test", breaker)
+    monkeypatch.setitem(steam_client._metrics, "steam.test", steam_client._HostMetrics())
+    monkeypatch.setattr(steam_client.steam_rate_limiter, "acquire", lambda timeout=None: False)
+
+    with pytest.raises(steam_client.SteamRateLimited):
+        steam_get("https://steam.test/api", rate_timeout=0)
+
+    assert breaker.allow()  # the probe was never handed out, so it is still available
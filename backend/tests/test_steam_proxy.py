@@ -0,0 +1,37 @@
+import time
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("requests")
+pytest.importorskip("pymongo")
+pytest.importorskip("jwt")
+
+from flask import Flask
+from steam_cache import MemoryCache
+from routes import steam_proxy
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    """steam_proxy with an in-memory cache and background refreshes recorded instead of run."""
+    cache = MemoryCache(stale_retention=steam_proxy.STEAM_CACHE_STALE_GRACE)
+    refreshes = []
+    monkeypatch.setattr(steam_proxy, "_cache", cache)
+    monkeypatch.setattr(steam_proxy, "_schedule_refresh", lambda key, *args: refreshes.append(key))
+    monkeypatch.setattr(steam_proxy, "steam_get", lambda *a, **k: pytest.fail("stale entry must not block on Steam"))
+    app = Flask(__name__)
+    app.register_blueprint(steam_proxy.steam_proxy_bp)
+    return app.test_client(), cache, refreshes
+
+
+def test_expired_but_retained_entry_is_served_stale(proxy):
+    client, cache, refreshes = proxy
+    payload = {"440": {"success": True, "data": {"name": "Team Fortress 2", "screenshots": []}}}
+    cache.set("details_440", payload, time.time() - 60)  # expired a minute ago, still within the grace window
+
+    response = client.get("/api/steam/440")
+
+    assert response.status_code == 200
+    assert response.headers["X-Cache-Status"] == "STALE"
+    assert response.get_json()["440"]["data"]["name"] == "Team Fortress 2"
+    assert refreshes == ["details_440"]
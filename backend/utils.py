@@ -1,57 +1,41 @@
-def fetch_supported_languages(appid):
-    """
-    Fetch supported languages from Steam API for a given appid.
-    Returns a list of language strings or an empty list if unavailable.
-    """
-    try:
-        url = f"https://store.steampowered.com/api/appdetails?appids={appid}&l=english"
-        response = requests.get(url, timeout=3)
-        if response.status_code == 200:
-            data = response.json()
-            if str(appid) in data and data[str(appid)].get('success'):
-                game_data = data[str(appid)].get('data', {})
-                languages_str = game_data.get('supported_languages', '')
-                # Remove all HTML tags
-                import re
-                languages_str = re.sub(r'<[^>]+>', '', languages_str)
-                langs = [lang.strip() for lang in languages_str.split(',') if lang.strip()]
-                return langs
-    except Exception:
-        pass
-    return []
+from flask import current_app, request
+from bson import json_util
+from functools import wraps
+import base64
+import json
+import threading
+import time
+import jwt
+from datetime import datetime
+from config import JWT_SECRET_KEY, db
+from normalize import to_field_list, to_string_list
+from serialization import dumps, to_extended_json
+from enrichment import enqueue_supported_languages
+from prices import get_stored_prices
+
+# ============================================================
+# STEAM ENRICHMENT (background)
+# ============================================================
 
 def enrich_with_supported_languages(game_data):
     """
-    Enrich a single game object with supported_languages from Steam API if missing.
-    Adds/updates 'supported_languages' in game_data['metadata'].
+    Queue a background supported_languages lookup for a game if it is missing.
+    Never calls Steam inline; the worker in enrichment.py writes the result back
+    to metadata.supported_languages for subsequent requests.
     """
     if isinstance(game_data, dict) and 'appid' in game_data:
-        appid = game_data['appid']
         meta = game_data.get('metadata', {})
         if not meta.get('supported_languages'):
-            langs = fetch_supported_languages(appid)
-            if langs:
-                if 'metadata' not in game_data:
-                    game_data['metadata'] = {}
-                game_data['metadata']['supported_languages'] = langs
+            enqueue_supported_languages(game_data['appid'])
     return game_data
 
 def enrich_games_with_supported_languages(games_list):
     """
-    Enrich a list of game objects with supported_languages from Steam API if missing.
+    Queue background supported_languages lookups for a list of games.
     """
     for game in games_list:
         enrich_with_supported_languages(game)
     return games_list
-from flask import jsonify, make_response, request
-from bson import json_util
-from functools import wraps
-import json
-import jwt
-import ast
-import requests
-from datetime import datetime
-from config import JWT_SECRET_KEY, db
 
 # ============================================================
 # GENERAL UTILITIES
@@ -61,34 +45,9 @@ def ensure_array(value):
     """
     Normalize a field to always be a list.
     Handles None, str, list, and stringified lists like "['Valve']".
+    Delegates to the memoized parser in normalize.py.
     """
-    if value is None:
-        return []
-    if isinstance(value, list):
-        cleaned = []
-        for item in value:
-            if isinstance(item, str):
-                # Try to parse stringified list
-                try:
-                    parsed = ast.literal_eval(item)
-                    if isinstance(parsed, list):
-                        cleaned.extend([str(x) for x in parsed])
-                    else:
-                        cleaned.append(str(parsed))
-                except Exception:
-                    cleaned.append(item.strip("[]'\""))
-            else:
-                cleaned.append(item)
-        return cleaned
-    if isinstance(value, str):
-        try:
-            parsed = ast.literal_eval(value)
-            if isinstance(parsed, list):
-                return [str(x) for x in parsed]
-            return [str(parsed)]
-        except Exception:
-            return [value.strip("[]'\"")]
-    return [value]
+    return to_string_list(value)
 
 def to_csv_string(value):
     """
@@ -116,11 +75,11 @@ def normalize_fields(doc):
 
     for field in ["developers", "publishers", "genres"]:
         if field in metadata:
-            metadata[field] = ensure_array(metadata[field])
+            metadata[field] = to_field_list(field, metadata[field])
 
     for field in ["tags", "supported_languages"]:
         if field in metadata:
-            metadata[field] = to_csv_string(metadata[field])
+            metadata[field] = ", ".join(to_field_list(field, metadata[field]))
 
     doc["metadata"] = metadata
     return doc
@@ -154,17 +113,18 @@ def clean_doc(doc):
     """Convert a MongoDB document into a clean, JSON-safe dict (without _id)."""
     if not doc:
         return None
-    doc = json.loads(json_util.dumps(doc))
+    doc = to_extended_json(doc)
     doc.pop("_id", None)
     doc = normalize_fields(doc)
     return doc
 
 def clean_docs(cursor):
     """Convert a MongoDB cursor into a clean list of JSON-safe dicts."""
-    docs = json.loads(json_util.dumps(list(cursor)))
-    for doc in docs:
+    docs = []
+    for doc in cursor:
+        doc = to_extended_json(doc)
         doc.pop("_id", None)
-        doc = normalize_fields(doc)
+        docs.append(normalize_fields(doc))
     return docs
 
 # ============================================================
@@ -178,15 +138,177 @@ def get_pagination_params():
     page_start = page_size * (page_num - 1)
     return page_num, page_size, page_start
 
+# ============================================================
+# KEYSET (CURSOR) PAGINATION
+# ============================================================
+
+def encode_cursor(sort, doc):
+    """Encode the sort key of `doc` as an opaque, URL-safe ?after= token."""
+    payload = {"k": [field for field, _ in sort], "v": [_get_path(doc, field) for field, _ in sort]}
+    raw = json_util.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token):
+    """Decode an ?after= token back into its {"k": fields, "v": values} payload."""
+    padded = token + "=" * (-len(token) % 4)
+    return json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+
+def _get_path(doc, path):
+    """Resolve a dotted field path (e.g. 'reviews.positive') in a nested dict."""
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def get_cursor_param(sort):
+    """
+    Read the ?after= cursor for the given sort spec.
+    Returns (values, error_response); values is None when no cursor was sent.
+    """
+    token = request.args.get("after")
+    if not token:
+        return None, None
+    try:
+        payload = decode_cursor(token)
+        if payload.get("k") != [field for field, _ in sort] or len(payload.get("v", [])) != len(sort):
+            raise ValueError("cursor does not match sort order")
+    except Exception:
+        return None, api_response({"error": "Invalid or expired cursor"}, status=400)
+    return payload["v"], None
+
+def _after_clause(field, direction, value):
+    """Condition for documents strictly after `value` on one sort key (nulls sort lowest)."""
+    if value is None:
+        return {field: {"$ne": None}} if direction == 1 else None
+    if direction == 1:
+        return {field: {"$gt": value}}
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+def keyset_query(query, sort, after):
+    """
+    Restrict `query` to documents positioned after the cursor values for `sort`.
+    `sort` must end with a unique tiebreaker (appid) so pages never overlap.
+    """
+    if after is None:
+        return query
+
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = _after_clause(field, direction, after[i])
+        if clause is not None:
+            equal_prefix = {sort[j][0]: after[j] for j in range(i)}
+            clauses.append({**equal_prefix, **clause})
+
+    # No clause means nothing can follow the cursor (e.g. last value was null on a descending key)
+    keyset = {"$or": clauses} if clauses else {"_id": {"$exists": False}}
+    return {"$and": [query, keyset]} if query else keyset
+
+def keyset_find(collection, query, projection, sort, page_start, page_size, after=None, collation=None):
+    """
+    Run a paginated find. With a cursor, seek by index instead of skipping;
+    otherwise fall back to skip/limit for ?pn= requests.
+    A `collation` applies to both the sort and the cursor comparisons.
+    Returns (docs, next_cursor).
+    """
+    cursor = collection.find(keyset_query(query, sort, after), projection).sort(sort)
+    if collation:
+        cursor = cursor.collation(collation)
+    if after is None:
+        cursor = cursor.skip(page_start)
+    # One extra document tells us whether a next page exists
+    docs = list(cursor.limit(page_size + 1))
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    next_token = encode_cursor(sort, docs[-1]) if has_more else None
+    return docs, next_token
+
+# ============================================================
+# RESULT COUNTS (cached / approximate totals)
+# ============================================================
+
+COUNT_CACHE_TTL = 60          # seconds a cached exact count is trusted
+COUNT_CACHE_MAX_ENTRIES = 1024
+APPROX_COUNT_LIMIT = 10000    # ?count=approx stops counting past this many matches
+
+# Per-process cache: {(collection_name, normalized_query): (cached_at, count)}
+# Other workers converge within COUNT_CACHE_TTL after an insert/delete.
+_count_cache = {}
+_count_lock = threading.Lock()
+
+def _count_key(collection, query):
+    return collection.name, json_util.dumps(query, sort_keys=True)
+
+def get_count_mode():
+    """Read ?count=approx|exact|none (None means the default cached behaviour)."""
+    mode = request.args.get("count", "").lower()
+    return mode if mode in ("approx", "exact", "none") else None
+
+def count_results(collection, query=None):
+    """
+    Return (total_count, is_estimate) for a paginated listing.
+    - default: unfiltered uses estimated_document_count, filtered uses a TTL cache
+    - exact:   always run count_documents (and refresh the cache)
+    - approx:  serve any cached value, otherwise count up to APPROX_COUNT_LIMIT
+    - none:    skip counting entirely (total_count is None)
+    """
+    mode = get_count_mode()
+    query = query or {}
+
+    if mode == "none":
+        return None, False
+    if not query and mode != "exact":
+        return collection.estimated_document_count(), False
+
+    key = _count_key(collection, query)
+    now = time.time()
+    with _count_lock:
+        cached = _count_cache.get(key)
+    if cached and mode != "exact":
+        cached_at, count = cached
+        if mode == "approx" or now - cached_at < COUNT_CACHE_TTL:
+            return count, False
+
+    if mode == "approx":
+        count = collection.count_documents(query, limit=APPROX_COUNT_LIMIT)
+        if count >= APPROX_COUNT_LIMIT:
+            return count, True
+    else:
+        count = collection.count_documents(query)
+
+    with _count_lock:
+        _count_cache.pop(key, None)
+        _count_cache[key] = (now, count)
+        while len(_count_cache) > COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.pop(next(iter(_count_cache)))
+    return count, False
+
+def invalidate_counts(collection):
+    """Drop cached counts for a collection after documents are inserted or deleted."""
+    with _count_lock:
+        for key in [k for k in _count_cache if k[0] == collection.name]:
+            del _count_cache[key]
+
 # ============================================================
 # STANDARD API RESPONSE
 # ============================================================
 
-def api_response(data, page_num=None, page_size=None, total_count=None, status=200):
-    """Return consistent API JSON responses with pagination links."""
+def _page_link(base_url, query_params):
+    return f"{base_url}?{'&'.join(f'{k}={v}' for k, v in query_params.items())}"
+
+def api_response(data, page_num=None, page_size=None, total_count=None, status=200,
+                 next_cursor=None, count_estimated=False):
+    """
+    Return consistent API JSON responses with pagination links.
+    When `next_cursor` is given, the `next` link seeks with ?after= instead of ?pn=.
+    A None `total_count` (?count=none) omits totals and the `last` link.
+    """
     response_body = {"data": data}
-    if page_num and page_size and total_count is not None:
-        total_pages = (total_count + page_size - 1) // page_size  # Ceiling division
+    if page_num and page_size and (total_count is not None or get_count_mode() == "none"):
+        total_pages = None
+        if total_count is not None:
+            total_pages = (total_count + page_size - 1) // page_size  # Ceiling division
         
         # Build pagination object
         pagination = {
@@ -195,78 +317,71 @@ def api_response(data, page_num=None, page_size=None, total_count=None, status=2
             "total_results": total_count,
             "total_pages": total_pages,
         }
+        if count_estimated:
+            pagination["total_is_estimate"] = True
         
         # Build navigation links (HATEOAS)
         base_url = request.base_url
         query_params = dict(request.args)
+        using_cursor = query_params.pop('after', None) is not None
         
         links = {}
         
         # First page
         query_params['pn'] = 1
-        links['first'] = f"{base_url}?{'&'.join(f'{k}={v}' for k, v in query_params.items())}"
+        links['first'] = _page_link(base_url, query_params)
         
         # Last page
-        query_params['pn'] = total_pages
-        links['last'] = f"{base_url}?{'&'.join(f'{k}={v}' for k, v in query_params.items())}"
+        if total_pages is not None:
+            query_params['pn'] = total_pages
+            links['last'] = _page_link(base_url, query_params)
         
-        # Previous page
-        if page_num > 1:
+        # Previous page (not available when seeking by cursor)
+        if page_num > 1 and not using_cursor:
             query_params['pn'] = page_num - 1
-            links['prev'] = f"{base_url}?{'&'.join(f'{k}={v}' for k, v in query_params.items())}"
+            links['prev'] = _page_link(base_url, query_params)
         
         # Next page
-        if page_num < total_pages:
+        if next_cursor:
+            query_params.pop('pn', None)
+            query_params['after'] = next_cursor
+            links['next'] = _page_link(base_url, query_params)
+            pagination['next_cursor'] = next_cursor
+        elif total_pages is not None and page_num < total_pages and not using_cursor:
             query_params['pn'] = page_num + 1
-            links['next'] = f"{base_url}?{'&'.join(f'{k}={v}' for k, v in query_params.items())}"
+            links['next'] = _page_link(base_url, query_params)
         
         pagination['links'] = links
         response_body["pagination"] = pagination
-    return make_response(jsonify(response_body), status)
+    return json_response(response_body, status)
+
+def json_response(body, status=200):
+    """Serialize `body` (pymongo types allowed) to response bytes in one pass."""
+    return current_app.response_class(dumps(body), status=status, mimetype="application/json")
 
 # ============================================================
 # STEAM API INTEGRATION
 # ============================================================
 
-def fetch_steam_price(appid):
-    """
-    Fetch accurate price from Steam API for a given appid.
-    Returns the formatted price string (e.g., '£4.29') or None if unavailable.
-    """
-    try:
-        url = f"https://store.steampowered.com/api/appdetails?appids={appid}&cc=gb&filters=price_overview"
-        response = requests.get(url, timeout=3)
-        if response.status_code == 200:
-            data = response.json()
-            if str(appid) in data and data[str(appid)].get('success'):
-                price_overview = data[str(appid)].get('data', {}).get('price_overview')
-                if price_overview:
-                    return price_overview.get('final_formatted')
-    except Exception:
-        pass
-    return None
-
 def enrich_with_steam_price(game_data):
     """
-    Enrich a single game object with Steam API price.
+    Enrich a single game object with its stored Steam price.
     Adds 'steam_price' field to the game data.
     """
-    if isinstance(game_data, dict) and 'appid' in game_data:
-        appid = game_data['appid']
-        steam_price = fetch_steam_price(appid)
-        game_data['steam_price'] = steam_price
+    enrich_games_with_steam_prices([game_data])
     return game_data
 
 def enrich_games_with_steam_prices(games_list):
     """
-    Enrich a list of game objects with Steam API prices.
-    Adds 'steam_price' field to each game.
+    Enrich a list of game objects with Steam prices from the local steam_prices store.
+    Adds 'steam_price' field to each game. Never calls Steam inline: missing or stale
+    prices are refreshed in the background (see prices.py) and show up on a later request.
     """
-    for game in games_list:
-        if isinstance(game, dict) and 'appid' in game:
-            appid = game['appid']
-            steam_price = fetch_steam_price(appid)
-            game['steam_price'] = steam_price
+    games = [g for g in games_list if isinstance(g, dict) and 'appid' in g]
+    prices = get_stored_prices([g['appid'] for g in games])
+    for game in games:
+        overview = (prices.get(game['appid']) or {}).get('price_overview')
+        game['steam_price'] = overview.get('final_formatted') if overview else None
     return games_list
 
 # ============================================================